@@ -10,6 +10,7 @@ from starlette.middleware.cors import CORSMiddleware
 from auth.config import CONFIG
 from auth.models.user import User
 from auth.models.flight_record import  FlightBookingRecord, FlightRecordDB, Source, Destination, Airline
+from auth.models.outbox import OutboxEmail
 
 from auth.routes.auth import router as AuthRouter
 from auth.routes.mail import router as MailRouter
@@ -17,7 +18,17 @@ from auth.routes.register import router as RegisterRouter
 from auth.routes.user import router as UserRouter
 from auth.routes.flight import router as FlightRouter
 from auth.routes.booking import router as BookingRouter
-
+from auth.routes.metrics import router as MetricsRouter
+from auth.service.predict_price import model_registry
+from auth.service.email_outbox import email_outbox
+from auth.service.prediction_log import prediction_log
+from auth.service.reference_data import reference_data
+from auth.util.metrics import MetricsMiddleware, MongoCommandCounter
+from auth.util.password import password_hasher
+from auth.util.profiling import ProfilingMiddleware
+from auth.util.responses import FastJSONResponse
+
+DOCUMENT_MODELS = [User, FlightRecordDB, Source, Destination, Airline, FlightBookingRecord, OutboxEmail]
 
 DESCRIPTION = """
 This API powers whatever I want to make
@@ -32,12 +43,19 @@ It supports:
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # type: ignore
     """Initialize application services."""
-    app.db = AsyncIOMotorClient(CONFIG.mongo_uri).flight_price_predictor  # type: ignore[attr-defined]
-    await init_beanie(
-        app.db, document_models=[User, FlightRecordDB, Source, Destination, Airline,FlightBookingRecord]
-    )  # type: ignore[arg-type,attr-defined]
+    client = AsyncIOMotorClient(CONFIG.mongo_uri, event_listeners=[MongoCommandCounter()])
+    app.db = client.flight_price_predictor  # type: ignore[attr-defined]
+    # Also creates the indexes declared on the models
+    await init_beanie(app.db, document_models=DOCUMENT_MODELS)  # type: ignore[arg-type,attr-defined]
+    model_registry.load()
+    await reference_data.refresh()
+    email_outbox.start()
+    prediction_log.start()
     print("Startup complete")
     yield
+    await prediction_log.stop()
+    await email_outbox.stop()
+    password_hasher.shutdown()
     print("Shutdown complete")
 
 
@@ -46,9 +64,12 @@ app = FastAPI(
     description=DESCRIPTION,
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -64,6 +85,7 @@ app.include_router(RegisterRouter)
 app.include_router(UserRouter)
 app.include_router(FlightRouter)
 app.include_router(BookingRouter)
+app.include_router(MetricsRouter)
 
 
 @app.get("/")
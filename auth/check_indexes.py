@@ -0,0 +1,97 @@
+"""Check that every hot query shape is served by an index.
+
+Usage::
+
+    python -m auth.check_indexes
+
+Connects to ``MONGO_URI``, creates the indexes declared on the models
+(as app startup does), runs ``explain()`` on each route's query shape and
+exits non-zero if any winning plan contains a COLLSCAN.
+
+Users sharing an email are reported first: they make the unique email
+index, and so app startup, fail. Resolve them before deploying.
+"""
+
+import asyncio
+import sys
+from collections.abc import Iterator
+from datetime import datetime, UTC
+
+from beanie import Document, init_beanie
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from auth.app import DOCUMENT_MODELS
+from auth.config import CONFIG
+from auth.models.flight_record import Airline, Destination, FlightBookingRecord, FlightRecordDB, Source
+from auth.models.outbox import OutboxEmail
+from auth.models.user import User
+
+# Values do not matter to the planner, only the fields and operators
+QUERY_SHAPES: list[tuple[str, type[Document], dict]] = [
+    ("current_user, login", User, {"email": "user@example.com"}),
+    ("POST /flight/logs", FlightRecordDB, {"user_id": ObjectId(), "booked": False, "_id": {"$gt": ObjectId()}}),
+    ("POST /flight/book, /flight/info, DELETE /flight/delete", FlightRecordDB, {"user_id": ObjectId(), "_id": ObjectId()}),
+    ("POST /flight/booked/logs", FlightBookingRecord, {"user_id": ObjectId(), "_id": {"$gt": ObjectId()}}),
+    ("POST /flight/booked/logs flight details", FlightRecordDB, {"_id": {"$in": [ObjectId(), ObjectId()]}}),
+    ("POST /flight/cancel", FlightBookingRecord, {"user_id": ObjectId(), "_id": ObjectId()}),
+    ("source lookup", Source, {"source": "Delhi"}),
+    ("destination lookup", Destination, {"destination": "Cochin"}),
+    ("airline lookup", Airline, {"airline": "IndiGo"}),
+    ("email outbox claim", OutboxEmail, {"status": "pending", "next_attempt_at": {"$lte": datetime.now(tz=UTC)}}),
+]
+
+
+# Beanie names the collection after the class
+USER_COLLECTION = User.__name__
+
+
+async def duplicate_emails(db) -> list[dict]:  # type: ignore[no-untyped-def]
+    """Return ``{"_id": email, "count": n}`` for every email held by more than one user."""
+    pipeline = [{"$group": {"_id": "$email", "count": {"$sum": 1}}}, {"$match": {"count": {"$gt": 1}}}]
+    return await db[USER_COLLECTION].aggregate(pipeline).to_list(None)
+
+
+def plan_stages(plan: dict | list) -> Iterator[str]:
+    """Yield every stage name in an explain plan tree."""
+    if isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+    elif isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            yield plan["stage"]
+        for value in plan.values():
+            if isinstance(value, (dict, list)):
+                yield from plan_stages(value)
+
+
+async def check_indexes() -> list[str]:
+    """Explain each query shape and return the names of those that scan a collection."""
+    db = AsyncIOMotorClient(CONFIG.mongo_uri).flight_price_predictor
+    duplicates = await duplicate_emails(db)
+    if duplicates:
+        for duplicate in duplicates:
+            print(f"DUPLICATE {duplicate['_id']} is used by {duplicate['count']} users")
+        return ["unique user email"]
+    await init_beanie(db, document_models=DOCUMENT_MODELS)  # type: ignore[arg-type]
+    failures = []
+    for name, model, query in QUERY_SHAPES:
+        explain = await model.get_motor_collection().find(query).explain()
+        stages = list(plan_stages(explain["queryPlanner"]["winningPlan"]))
+        status = "COLLSCAN" if "COLLSCAN" in stages else "ok"
+        print(f"{status:8} {model.get_collection_name():15} {name}: {' <- '.join(stages)}")
+        if status != "ok":
+            failures.append(name)
+    return failures
+
+
+def main() -> None:
+    failures = asyncio.run(check_indexes())
+    if failures:
+        print(f"Failed: {', '.join(failures)}")
+        sys.exit(1)
+    print("All query shapes use an index")
+
+
+if __name__ == "__main__":
+    main()
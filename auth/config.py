@@ -1,6 +1,6 @@
 """FastAPI server configuration."""
 
-from decouple import config
+from decouple import Csv, config
 from pydantic import BaseModel
 
 
@@ -15,6 +15,13 @@ class Settings(BaseModel):
     # Security settings
     authjwt_secret_key: str = config("SECRET_KEY")
     salt: bytes = config("SALT",default="$2b$12$pQiKsXkDNL5gdKEwgDfnne").encode()
+    # bcrypt threads (0 picks min(cpu count, 4)) and how many more calls may wait for one
+    password_hash_workers: int = config("PASSWORD_HASH_WORKERS", default=0, cast=int)
+    password_hash_queue: int = config("PASSWORD_HASH_QUEUE", default=64, cast=int)
+    # Authenticated users cached per worker by JWT subject; changes are seen
+    # by other workers within the TTL
+    user_cache_size: int = config("USER_CACHE_SIZE", default=1024, cast=int)
+    user_cache_ttl: float = config("USER_CACHE_TTL", default=30.0, cast=float)
 
     # FastMail SMTP server settings
     mail_console: bool = config("MAIL_CONSOLE", default=False, cast=bool)
@@ -23,6 +30,48 @@ class Settings(BaseModel):
     mail_username: str = config("MAIL_USERNAME", default="")
     mail_password: str = config("MAIL_PASSWORD", default="")
     mail_sender: str = config("MAIL_SENDER", default="noreply@myserver.io")
+    # Implicit TLS by default; set both false for a local debug sink such as
+    # `python -m aiosmtpd -n -l localhost:1025`
+    mail_ssl_tls: bool = config("MAIL_SSL_TLS", default=True, cast=bool)
+    mail_starttls: bool = config("MAIL_STARTTLS", default=False, cast=bool)
+    # Email outbox sender
+    mail_batch_size: int = config("MAIL_BATCH_SIZE", default=20, cast=int)
+    mail_max_attempts: int = config("MAIL_MAX_ATTEMPTS", default=6, cast=int)
+    mail_retry_delay: float = config("MAIL_RETRY_DELAY", default=10.0, cast=float)
+    mail_poll_interval: float = config("MAIL_POLL_INTERVAL", default=2.0, cast=float)
+    mail_idle_timeout: float = config("MAIL_IDLE_TIMEOUT", default=30.0, cast=float)
+
+    # Price model settings
+    model_path: str = config("MODEL_PATH", default="ml/flight_price_rf.pkl")
+    model_check_interval: float = config("MODEL_CHECK_INTERVAL", default=5.0, cast=float)
+    # "sklearn" scores with the pickled forest, "flat" with ml.tree_engine.FlatForest
+    model_engine: str = config("MODEL_ENGINE", default="sklearn")
+    prediction_cache_size: int = config("PREDICTION_CACHE_SIZE", default=4096, cast=int)
+    prediction_cache_ttl: float = config("PREDICTION_CACHE_TTL", default=300.0, cast=float)
+    predict_batch_limit: int = config("PREDICT_BATCH_LIMIT", default=1000, cast=int)
+    # Respond before prediction logs are written; they are bulk inserted in
+    # the background and may take up to the flush interval to be bookable
+    prediction_log_write_behind: bool = config("PREDICTION_LOG_WRITE_BEHIND", default=False, cast=bool)
+    prediction_log_flush_size: int = config("PREDICTION_LOG_FLUSH_SIZE", default=500, cast=int)
+    prediction_log_flush_interval: float = config("PREDICTION_LOG_FLUSH_INTERVAL", default=1.0, cast=float)
+    prediction_log_buffer_size: int = config("PREDICTION_LOG_BUFFER_SIZE", default=20000, cast=int)
+    # Rows scored per model call and in-memory upload bytes for /flight/predict/stream
+    stream_chunk_size: int = config("STREAM_CHUNK_SIZE", default=256, cast=int)
+    stream_spool_size: int = config("STREAM_SPOOL_SIZE", default=1 << 20, cast=int)
+
+    # Largest page the log listings serve
+    logs_page_limit: int = config("LOGS_PAGE_LIMIT", default=1000, cast=int)
+
+    # Seconds before a worker re-reads the sources, destinations and airlines
+    reference_refresh_interval: float = config("REFERENCE_REFRESH_INTERVAL", default=60.0, cast=float)
+
+    # Per-request profiling, enabled by setting the admin token
+    profile_token: str = config("PROFILE_TOKEN", default="")
+    profile_dir: str = config("PROFILE_DIR", default="profiles")
+    profile_rate_limit: int = config("PROFILE_RATE_LIMIT", default=6, cast=int)
+    profile_interval: float = config("PROFILE_INTERVAL", default=0.005, cast=float)
+    # Background tasks to profile on every run, e.g. "email_outbox,prediction_log"
+    profile_tasks: list[str] = config("PROFILE_TASKS", default="", cast=Csv())
 
     testing: bool = config("TESTING", default=False, cast=bool)
 
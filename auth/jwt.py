@@ -6,6 +6,7 @@ from fastapi_jwt import JwtAuthorizationCredentials, JwtAccessBearer, JwtRefresh
 
 from auth.config import CONFIG
 from auth.models.user import User
+from auth.util.cache import TTLCache
 
 ACCESS_EXPIRES = timedelta(days=1)
 REFRESH_EXPIRES = timedelta(days=30)
@@ -22,10 +23,25 @@ refresh_security = JwtRefreshBearer(
     refresh_expires_delta=REFRESH_EXPIRES,
 )
 
+user_cache = TTLCache(CONFIG.user_cache_size, CONFIG.user_cache_ttl)
+
 
 async def user_from_credentials(auth: JwtAuthorizationCredentials) -> User | None:
-    """Return the user associated with auth credentials."""
-    return await User.by_email(auth.subject["username"])
+    """Return the user associated with auth credentials, cached by subject."""
+    username = auth.subject["username"]
+    user = user_cache.get(username)
+    if user is None:
+        user = await User.by_email(username)
+        if user is None:
+            return None
+        user_cache.set(username, user)
+    # Handlers may modify the user they are given; keep the cached one intact
+    return user.model_copy()
+
+
+def invalidate_user(username: str) -> None:
+    """Drop a user from the cache after it changed or was deleted."""
+    user_cache.pop(username)
 
 
 async def user_from_token(token: str) -> User | None:
@@ -0,0 +1,64 @@
+"""Backfill total_price on bookings created before it was stored.
+
+Usage::
+
+    python -m auth.migrations.backfill_total_price [--batch-size 1000] [--dry-run]
+
+Sets ``total_price = quantity * predicted_price`` of the booked flight on
+every booking whose total is missing or zero, one batch of bookings, one
+``$in`` flight fetch and one bulk write at a time. Safe to re-run.
+"""
+
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from auth.config import CONFIG
+
+LEGACY_FILTER = {"$or": [{"total_price": 0}, {"total_price": {"$exists": False}}]}
+
+
+async def backfill_total_price(batch_size: int = 1000, dry_run: bool = False) -> tuple[int, int]:
+    """Return (bookings updated, bookings whose flight no longer exists)."""
+    db = AsyncIOMotorClient(CONFIG.mongo_uri).flight_price_predictor
+    updated = missing = 0
+    last_id = None
+    while True:
+        query = LEGACY_FILTER if last_id is None else {**LEGACY_FILTER, "_id": {"$gt": last_id}}
+        bookings = await db.bookings.find(query, {"flight_id": 1, "quantity": 1}).sort("_id", 1).to_list(batch_size)
+        if not bookings:
+            break
+        last_id = bookings[-1]["_id"]
+        flight_ids = list({booking["flight_id"] for booking in bookings})
+        prices = {
+            flight["_id"]: flight["predicted_price"]
+            async for flight in db.flight_records.find({"_id": {"$in": flight_ids}}, {"predicted_price": 1})
+        }
+        updates = []
+        for booking in bookings:
+            price = prices.get(booking["flight_id"])
+            if price is None:
+                missing += 1
+                continue
+            total_price = booking.get("quantity", 1) * price
+            updates.append(UpdateOne({"_id": booking["_id"]}, {"$set": {"total_price": total_price}}))
+        if updates and not dry_run:
+            await db.bookings.bulk_write(updates, ordered=False)
+        updated += len(updates)
+    return updated, missing
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="count the bookings without writing")
+    args = parser.parse_args()
+    updated, missing = asyncio.run(backfill_total_price(args.batch_size, args.dry_run))
+    action = "Would update" if args.dry_run else "Updated"
+    print(f"{action} {updated} bookings; {missing} reference a flight that no longer exists")
+
+
+if __name__ == "__main__":
+    main()
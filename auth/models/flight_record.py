@@ -1,7 +1,10 @@
-from beanie import Document, PydanticObjectId
+from beanie import Document, Indexed, PydanticObjectId
 from datetime import datetime
+from typing import Annotated
 
-from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator, root_validator, validator
+from pymongo import ASCENDING, IndexModel
+
+from pydantic import BaseModel, Field, field_validator
 
 from bson import ObjectId
 
@@ -14,20 +17,9 @@ class FlightRecordIn(BaseModel):
     arrival_time: datetime
     transit_count: int
 
-    @classmethod
-    def validate_origin(cls, value):
-        if not Source.find_one(Source.source == value):
-            raise ValueError(f"Origin {value} is not a valid source")
-
-    @classmethod
-    def validate_destination(cls, value):
-        if not Destination.find_one(Destination.destination == value):
-            raise ValueError(f"Destination {value} is not a valid destination")
-
-    @classmethod
-    def validate_airline(cls, value):
-        if not Airline.find_one(Airline.airline == value):
-            raise ValueError(f"Airline {value} is not a valid airline")
+    # Origins, destinations and airlines are checked against the cached
+    # reference data by auth.service.validation, not here: validators must
+    # not query the database.
 
     class Config:
         json_schema_extra = {
@@ -53,6 +45,10 @@ class FlightRecordDB(FlightRecord, Document):
 
     class Settings:
         name = "flight_records"
+        indexes = [
+            # /flight/logs lists a user's unbooked records in _id order
+            IndexModel([("user_id", ASCENDING), ("booked", ASCENDING), ("_id", ASCENDING)], name="user_id_booked_id"),
+        ]
 
     class Config:
         json_encoders = {ObjectId: str}
@@ -69,7 +65,7 @@ class FlightRecordOut(FlightRecordDB):
 class Source(Document):
     """Destinations Document."""
 
-    source: str
+    source: Annotated[str, Indexed()]
     array: list[int]
 
     class Settings:
@@ -79,7 +75,7 @@ class Source(Document):
 class Airline(Document):
     """Destinations Document."""
 
-    airline: str
+    airline: Annotated[str, Indexed()]
     array: list[int]
 
     class Settings:
@@ -92,7 +88,7 @@ class Airline(Document):
 class Destination(Document):
     """Destinations Document."""
 
-    destination: str
+    destination: Annotated[str, Indexed()]
     array: list[int]
 
     class Settings:
@@ -123,23 +119,14 @@ class FlightBookingInput(BaseModel):
         return value
 
 class FlightBookingRecord(FlightBookingInput,Document):
+    # Resolved from the booked flight by auth.service.validation.build_booking_record
     total_price: float=0
 
-    
-    @model_validator(mode='after')
-    def total_price_must_not_be_zero(cls, values):
-        if 'total_price' in values and values['total_price'] == 0:
-            flight_record:FlightRecordDB = FlightRecordDB.find_one(FlightRecordDB.id == values['flight_id']).run_sync()
-            if not flight_record:
-                raise ValueError("Flight record not found")
-            predicted_price = flight_record.predicted_price
-            values['total_price'] = values['quantity'] *predicted_price
-        return values
-    
-    
-    
     class Settings:
         name = "bookings"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"),
+        ]
     
 class FlightBookingDetails(BaseModel):
     booking_id: str
@@ -0,0 +1,29 @@
+"""Email outbox models."""
+
+from datetime import datetime, UTC
+
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+
+class OutboxEmail(Document):
+    """An email waiting for, or done with, the background sender."""
+
+    recipients: list[str]
+    subject: str
+    html: str
+    # pending -> sent, or failed once the attempts run out
+    status: str = "pending"
+    attempts: int = 0
+    # Earliest time a sender may claim the email; a claim pushes it out by a lease
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(tz=UTC))
+    last_error: str | None = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(tz=UTC))
+    sent_at: datetime | None = None
+
+    class Settings:
+        name = "email_outbox"
+        indexes = [
+            IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+        ]
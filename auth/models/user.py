@@ -27,7 +27,7 @@ class UserUpdate(BaseModel):
 class UserOut(UserUpdate):
     """User fields returned to the client."""
 
-    email: Annotated[str, Indexed(EmailStr, unique=True)]
+    email: Annotated[EmailStr, Indexed(unique=True)]
     disabled: bool = False
 
 
@@ -6,7 +6,7 @@ from fastapi_jwt import JwtAuthorizationCredentials
 from auth.models.auth import AccessToken, RefreshToken
 from auth.models.user import User, UserAuth
 from auth.jwt import access_security, refresh_security
-from auth.util.password import hash_password
+from auth.util.password import verify_password
 
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 async def login(user_auth: UserAuth) -> RefreshToken:
     """Authenticate and returns the user's JWT."""
     user = await User.by_email(user_auth.email)
-    if user is None or hash_password(user_auth.password) != user.password:
+    if user is None or not await verify_password(user_auth.password, user.password):
         raise HTTPException(status_code=401, detail="Bad email or password")
     if user.email_confirmed_at is None:
         raise HTTPException(status_code=400, detail="Email is not yet verified")
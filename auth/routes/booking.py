@@ -1,18 +1,24 @@
 
-import json
+from collections.abc import AsyncIterator
+
+from beanie import UpdateResponse
+from beanie.odm.queries.find import FindMany
+from beanie.operators import In, Set
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException, Response
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from auth.models.flight_record import (
     FlightBookingInput,
     FlightBookingRecord,
     FlightRecordDB,
-    FlightRecordOut,
 )
+from auth.config import CONFIG
 from auth.models.user import User
 from auth.service.get_booking_details import get_booking_details
+from auth.service.pagination import after_id, batched_cursor, fetch_page, stream_json
+from auth.service.validation import build_booking_record
 from auth.util.current_user import current_user
+from auth.util.responses import FastJSONResponse
 from auth.util.mail import send_booking_email, send_cancellation_email
 
 router = APIRouter(prefix="/flight", tags=["Booking"])
@@ -20,25 +26,34 @@ router = APIRouter(prefix="/flight", tags=["Booking"])
 @router.post("/book")
 async def book_flight(flight_booking: FlightBookingInput,user: User = Depends(current_user)) -> Response:
     """Book a flight"""
+    # Claim the flight atomically: of concurrent requests only one matches booked == False
     flight_record = await FlightRecordDB.find_one(
-        FlightRecordDB.user_id == user.id, FlightRecordDB.id == ObjectId(flight_booking.flight_id)
-    )
+        FlightRecordDB.user_id == user.id,
+        FlightRecordDB.id == ObjectId(flight_booking.flight_id),
+        FlightRecordDB.booked == False,  # noqa: E712
+    ).update(Set({FlightRecordDB.booked: True}), response_type=UpdateResponse.NEW_DOCUMENT)
     if flight_record is None:
-        raise HTTPException(404, "No flight info found")
-    if flight_record.booked:
+        # Only the failure path pays for telling the two cases apart
+        if await FlightRecordDB.find_one(
+            FlightRecordDB.user_id == user.id, FlightRecordDB.id == ObjectId(flight_booking.flight_id)
+        ) is None:
+            raise HTTPException(404, "No flight info found")
         raise HTTPException(400, "Flight already booked")
     if not flight_booking.user_id:
         flight_booking.user_id = user.id
-    flight_record.booked = True
     if not flight_booking.email:
         flight_booking.email=user.email
-    total_price = flight_record.predicted_price * flight_booking.quantity
-    booking_record_db = FlightBookingRecord(**flight_booking.model_dump(), total_price=total_price)
-    await booking_record_db.save()
-    booking_details = await get_booking_details(user.id,flight_booking.flight_id,booking_record_db)  
+    try:
+        booking_record_db = await build_booking_record(flight_booking, flight_record)
+        await booking_record_db.insert()
+    except Exception:
+        # Release the flight so the booking can be retried
+        await flight_record.set({FlightRecordDB.booked: False})
+        raise
+    booking_details = get_booking_details(user, flight_record, booking_record_db)
     await send_booking_email(booking_details)
-    return JSONResponse(
-        content={"success": True, "message": "Flight booked", "data": json.loads(booking_record_db.model_dump_json())}, status_code=201
+    return FastJSONResponse(
+        content={"success": True, "message": "Flight booked", "data": booking_record_db}, status_code=201, by_alias=False
     )
 
 
@@ -50,40 +65,80 @@ async def get_flight_info(flight_id: str, user: User = Depends(current_user)):
     )
     if flight_record_db is None:
         raise HTTPException(404, "No flight info found")
-    return JSONResponse(content={"success": True, "data": jsonable_encoder(FlightRecordOut.model_validate(flight_record_db.model_dump()))},status_code=200)
+    return FastJSONResponse(content={"success": True, "data": flight_record_db}, status_code=200)
 
 @router.post("/cancel")
 async def cancel_flight_booking(booking_id: str, user: User = Depends(current_user)) -> Response:
     """Cancel a flight booking"""
 
-    booking=await FlightBookingRecord.find_one(FlightBookingRecord.user_id == ObjectId(user.id),FlightBookingRecord.id==ObjectId(booking_id))
-    if not booking:
-        raise HTTPException(404, "No booking found")
-    if booking.cancelled:
+    # Cancel atomically: of concurrent requests only one matches cancelled == False
+    booking = await FlightBookingRecord.find_one(
+        FlightBookingRecord.user_id == ObjectId(user.id),
+        FlightBookingRecord.id == ObjectId(booking_id),
+        FlightBookingRecord.cancelled == False,  # noqa: E712
+    ).update(Set({FlightBookingRecord.cancelled: True}), response_type=UpdateResponse.NEW_DOCUMENT)
+    if booking is None:
+        if await FlightBookingRecord.find_one(
+            FlightBookingRecord.user_id == ObjectId(user.id), FlightBookingRecord.id == ObjectId(booking_id)
+        ) is None:
+            raise HTTPException(404, "No booking found")
         raise HTTPException(400, "Flight already cancelled")
-    booking.cancelled = True
-    await booking.save()
-    booking_details = await get_booking_details(user.id,booking.flight_id,booking)
-    if not booking_details:
-        raise HTTPException(404, "No booking details found")
+    # Release the flight so it can be booked again
+    flight_record = await FlightRecordDB.find_one(
+        FlightRecordDB.user_id == user.id,
+        FlightRecordDB.id == booking.flight_id,
+        FlightRecordDB.booked == True,  # noqa: E712
+    ).update(Set({FlightRecordDB.booked: False}), response_type=UpdateResponse.NEW_DOCUMENT)
+    if flight_record is None:
+        flight_record = await FlightRecordDB.find_one(
+            FlightRecordDB.user_id == user.id, FlightRecordDB.id == booking.flight_id
+        )
+    if flight_record is None:
+        raise HTTPException(404, "Flight record not found")
+    booking_details = get_booking_details(user, flight_record, booking)
     await send_cancellation_email(booking_details)
     return JSONResponse(
         content={"success": True, "message": "Flight booking cancelled"}, status_code=200
     )
 
 @router.post("/booked/logs")
-async def get_booked_flights_logs(user: User = Depends(current_user)) -> list:
-    """Get booked flights logs"""
-    flight_records = await FlightBookingRecord.find(  # noqa: F821
-        FlightBookingRecord.user_id == user.id  # noqa: E712
-    ).to_list()
+async def get_booked_flights_logs(
+    limit: int | None = Query(None, ge=1, le=CONFIG.logs_page_limit),
+    after: str | None = None,
+    stream: bool = False,
+    user: User = Depends(current_user),
+) -> Response:
+    """Get booked flights logs, oldest first, paged and streamed like /flight/logs"""
+    query = FlightBookingRecord.find(  # noqa: F821
+        FlightBookingRecord.user_id == user.id, *after_id(FlightBookingRecord, after)  # noqa: E712
+    ).sort("+_id")
+    if stream:
+        return StreamingResponse(stream_json(booked_log_batches(query.limit(limit))), media_type="application/json")
+    flight_records, next_after = await fetch_page(query, limit)
+    return FastJSONResponse(
+        content={"success": True, "data": await booked_logs(flight_records), "next": next_after}, status_code=200
+    )
+
+
+async def booked_log_batches(query: FindMany) -> AsyncIterator[list[dict]]:
+    """Join bookings with their flights a cursor batch at a time."""
+    async for flight_records in batched_cursor(query):
+        yield await booked_logs(flight_records)
+
+
+async def booked_logs(flight_records: list[FlightBookingRecord]) -> list[dict]:
+    """Join bookings with their flights."""
+    # One $in query for every booking's flight instead of one query per booking
+    flight_ids = list({record.flight_id for record in flight_records})
+    flights = {
+        flight.id: flight for flight in await FlightRecordDB.find(In(FlightRecordDB.id, flight_ids)).to_list()
+    } if flight_ids else {}
     result = []
     for record in flight_records:
-        flight_details = await FlightRecordDB.find_one(FlightRecordDB.id == ObjectId(record.flight_id))
-        if record.total_price == 0:
-            # old records may not contain total price record in db
+        flight_details = flights.get(record.flight_id)
+        if record.total_price == 0 and flight_details is not None:
+            # Old records may lack a total price until auth.migrations.backfill_total_price runs
             record.total_price = record.quantity * flight_details.predicted_price
-            record.save()
         result.append({
             "_id": str(record.id),
             "user_id": str(record.user_id),
@@ -93,4 +148,4 @@ async def get_booked_flights_logs(user: User = Depends(current_user)) -> list:
             "total_price": record.total_price,
             "flight_details": flight_details
         })
-    return JSONResponse(content={"success": True, "data":jsonable_encoder(result)},status_code=200)
+    return result
@@ -6,6 +6,7 @@ from auth.models.flight_record import (
     Source,
 )
 from auth.models.user import User
+from auth.service.reference_data import reference_data
 from auth.util.current_user import current_user
 from auth.models.flight_record import Airline
 
@@ -14,34 +15,31 @@ router = APIRouter(prefix="/flight", tags=["Flight"])
 @router.get("/sources")
 async def source_keys() -> list:
     """Fetch all source keys"""
-    sources = await Source.find().to_list()
+    sources = (await reference_data.get()).sources
     if not sources:
         raise HTTPException(404, "No sources found")
-    return [source.source for source in sources]
+    return list(sources)
 
 
 @router.get("/destinations")
 async def destination_keys() -> list:
     """Fetch all destination keys"""
-    destinations = await Destination.find().to_list()
-    if destinations is None:
-        raise HTTPException(404, "No destinations found")
-    return JSONResponse(content={"data":[destination.destination for destination in destinations],"success":True},status_code=200)
+    destinations = (await reference_data.get()).destinations
+    return JSONResponse(content={"data":list(destinations),"success":True},status_code=200)
 
 
 @router.get("/airlines")
 async def airline_keys() -> list:
     """Fetch all airline keys"""
-    airlines = await Airline.find().to_list()
-    if airlines is None:
-        raise HTTPException(404, "No airlines found")
-    return JSONResponse(content={"data":[airline.airline for airline in airlines],"success":True},status_code=200)
+    airlines = (await reference_data.get()).airlines
+    return JSONResponse(content={"data":list(airlines),"success":True},status_code=200)
 
 
 @router.post("/source")
 async def add_sources(sources: list[Source],user: User = Depends(current_user)) -> Response:
     """Add source keys in bulk"""
     await Source.insert_many(sources)
+    await reference_data.refresh()
     return JSONResponse(
         content={"success": True, "message": "Sources added"}, status_code=201
     )
@@ -51,6 +49,7 @@ async def add_sources(sources: list[Source],user: User = Depends(current_user))
 async def add_destination(destinations: list[Destination],user: User = Depends(current_user)) -> Response:
     """Add source keys in bulk"""
     await Destination.insert_many(destinations)
+    await reference_data.refresh()
     return JSONResponse(
         content={"success": True, "message": "Destinations added"}, status_code=201
     )
@@ -60,6 +59,7 @@ async def add_destination(destinations: list[Destination],user: User = Depends(c
 async def add_airlines(airlines: list[Airline],user: User = Depends(current_user)) -> Response:
     """Add source keys in bulk"""
     await Airline.insert_many(airlines)
+    await reference_data.refresh()
     return JSONResponse(
         content={"success": True, "message": "Airlines added"}, status_code=201
     )
@@ -1,17 +1,20 @@
 """User router."""
 
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException, Response
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from auth.config import CONFIG
 from auth.models.flight_record import (
     FlightRecordDB,
     FlightRecordIn,
-    FlightRecordOut,
 )
 from auth.models.user import User
-from auth.service.predict_price import predict_price
+from auth.service.bulk_scoring import FORMATS, score_file, spool_request_body
+from auth.service.pagination import Page, after_id, batched_cursor, fetch_page, stream_json
+from auth.service.predict_price import PREDICT_STAGE_SECONDS, predict_price, predict_prices
+from auth.service.prediction_log import prediction_log
 from auth.util.current_user import current_user
+from auth.util.responses import FastJSONResponse
 
 router = APIRouter(prefix="/flight", tags=["Flight"])
 
@@ -22,28 +25,77 @@ async def predict_flight_price(flight_record: FlightRecordIn, user: User = Depen
     flight_logs = [{"user_id": user.id, **predicted_price, **flight_record.model_dump()} for predicted_price in predicted_prices]
 
     flight_logs_db = [FlightRecordDB(**flight_log) for flight_log in flight_logs]
-    db_data = await FlightRecordDB.insert_many(flight_logs_db)
-
-    return JSONResponse(
-        content={
-            "success": True,
-            "data": [
-                {
-                    **jsonable_encoder(FlightRecordOut.model_validate({**flight_log,"_id": str(db_data.inserted_ids[index])}).model_dump())
-                } for index,flight_log in enumerate(flight_logs)
-            ]
-        },
-        status_code=200
-    )
+    with PREDICT_STAGE_SECONDS.time("db_insert"):
+        await prediction_log.save(flight_logs_db)
+
+    return FastJSONResponse(content={"success": True, "data": flight_logs_db}, status_code=200, by_alias=False)
+
+
+@router.post("/predict/batch")
+async def predict_flight_prices(flight_records: list[FlightRecordIn], user: User = Depends(current_user)):
+    """Predict prices for many itineraries with one model call and one insert."""
+    if len(flight_records) > CONFIG.predict_batch_limit:
+        raise HTTPException(413, f"At most {CONFIG.predict_batch_limit} itineraries per batch")
+    results = await predict_prices(flight_records)
+    batch_logs = []
+    for flight_record, predicted_prices in zip(flight_records, results):
+        if isinstance(predicted_prices, HTTPException):
+            batch_logs.append(predicted_prices)
+            continue
+        record = flight_record.model_dump()
+        batch_logs.append([{"user_id": user.id, **predicted_price, **record} for predicted_price in predicted_prices])
+
+    flight_logs_db = [FlightRecordDB(**flight_log) for flight_logs in batch_logs if isinstance(flight_logs, list) for flight_log in flight_logs]
+    with PREDICT_STAGE_SECONDS.time("db_insert"):
+        await prediction_log.save(flight_logs_db)
+    saved = iter(flight_logs_db)
+
+    data = []
+    for flight_logs in batch_logs:
+        if isinstance(flight_logs, HTTPException):
+            data.append({"success": False, "status_code": flight_logs.status_code, "detail": flight_logs.detail})
+        else:
+            data.append({"success": True, "data": [next(saved) for _ in flight_logs]})
+    return FastJSONResponse(content={"success": True, "data": data}, status_code=200, by_alias=False)
+
+
+@router.post("/predict/stream")
+async def predict_flight_price_stream(
+    request: Request, file_format: str | None = Query(None, alias="format"), user: User = Depends(current_user)
+) -> StreamingResponse:
+    """Score a CSV or NDJSON file of itineraries and stream NDJSON predictions back.
+
+    The format comes from ``?format=`` or the request content type. Results
+    are not logged to the user's flight records.
+    """
+    file_format = file_format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if file_format not in FORMATS:
+        raise HTTPException(400, f"Unsupported format {file_format}, expected one of {', '.join(FORMATS)}")
+    body = await spool_request_body(request)
+    return StreamingResponse(score_file(body, file_format), media_type="application/x-ndjson")
 
 
 @router.post("/logs")
-async def flight_logs(user: User = Depends(current_user)) -> list:  # type: ignore[no-untyped-def]
-    """Update allowed user fields."""
-    flight_records = await FlightRecordDB.find(
-        FlightRecordDB.user_id == user.id,FlightRecordDB.booked == False  # noqa: E712
-    ).to_list()
-    return JSONResponse(content={"success": True, "data": jsonable_encoder(flight_records)},status_code=200)  # noqa: E712flight_records
+async def flight_logs(
+    limit: int | None = Query(None, ge=1, le=CONFIG.logs_page_limit),
+    after: str | None = None,
+    stream: bool = False,
+    user: User = Depends(current_user),
+) -> Response:
+    """List unbooked flight records oldest first.
+
+    With ``limit`` the response carries a ``next`` token to pass as
+    ``after``; ``stream`` writes the records out as the cursor yields them.
+    """
+    query = FlightRecordDB.find(
+        FlightRecordDB.user_id == user.id, FlightRecordDB.booked == False, *after_id(FlightRecordDB, after)  # noqa: E712
+    ).sort("+_id")
+    if stream:
+        return StreamingResponse(stream_json(batched_cursor(query.limit(limit))), media_type="application/json")
+    flight_records, next_after = await fetch_page(query, limit)
+    return FastJSONResponse(
+        content={"success": True, "data": flight_records, "next": next_after}, schema=Page[FlightRecordDB]
+    )
 
 
 @router.delete("/delete/{id}")
@@ -7,7 +7,7 @@ from fastapi.responses import JSONResponse
 from pydantic import EmailStr
 
 from auth.models.user import User
-from auth.jwt import access_security, user_from_token
+from auth.jwt import access_security, invalidate_user, user_from_token
 from auth.util.mail import send_verification_email
 
 
@@ -42,4 +42,5 @@ async def verify_email(token: str) -> Response:
         raise HTTPException(400, "Your account is disabled")
     user.email_confirmed_at = datetime.now(tz=UTC)
     await user.save()
+    invalidate_user(user.email)
     return JSONResponse(status_code=200,content={"message": "Email verified"})
@@ -0,0 +1,45 @@
+"""Prometheus metrics router."""
+
+from collections.abc import Callable
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from auth.jwt import user_cache
+from auth.service.email_outbox import email_outbox
+from auth.service.predict_price import model_registry, prediction_cache
+from auth.service.prediction_log import prediction_log
+from auth.service.reference_data import reference_data
+from auth.util.metrics import GaugeCallback, render
+from auth.util.password import password_hasher
+
+router = APIRouter(tags=["Metrics"])
+
+
+def stats_gauge(name: str, help: str, stats: Callable[[], dict]) -> GaugeCallback:
+    """Export the numeric entries of a ``stats()`` dict as one gauge labeled by stat."""
+    return GaugeCallback(
+        name,
+        help,
+        lambda: {(key,): value for key, value in stats().items() if isinstance(value, (int, float))},
+        ("stat",),
+    )
+
+
+stats_gauge("prediction_cache", "Prediction cache size and hit, miss and eviction counts", prediction_cache.stats)
+stats_gauge("user_cache", "Authenticated user cache size and hit, miss and eviction counts", user_cache.stats)
+stats_gauge("password_hash_pool", "Password hashing pool occupancy and totals", password_hasher.stats)
+stats_gauge("prediction_log_buffer", "Prediction log write-behind buffer occupancy and flushes", prediction_log.stats)
+stats_gauge(
+    "email_outbox",
+    "Emails sent, retried and given up on by this worker",
+    lambda: {"sent": email_outbox.sent, "retried": email_outbox.retried, "failed": email_outbox.failed},
+)
+stats_gauge("model", "Loaded price model size and load time", model_registry.stats)
+GaugeCallback("reference_data_version", "Version of the cached reference data", lambda: {(): reference_data.version})
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """Return this worker's metrics in the Prometheus text format."""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
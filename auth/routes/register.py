@@ -5,7 +5,7 @@ from fastapi.responses import JSONResponse
 from pydantic import EmailStr
 
 from auth.models.user import User, UserAuth, UserOut
-from auth.jwt import access_security, user_from_token
+from auth.jwt import access_security, invalidate_user, user_from_token
 from auth.routes.mail import request_verification_email
 from auth.util.mail import send_password_reset_email
 from auth.util.password import hash_password
@@ -21,7 +21,7 @@ async def user_registration(user_auth: UserAuth):  # type: ignore[no-untyped-def
     user = await User.by_email(user_auth.email)
     if user is not None:
         raise HTTPException(409, "User with that email already exists")
-    hashed = hash_password(user_auth.password)
+    hashed = await hash_password(user_auth.password)
     user = User(email=user_auth.email, password=hashed)
     await user.create()
     await request_verification_email(user_auth.email)
@@ -53,6 +53,7 @@ async def reset_password(token: str, password: str = Body(..., embed=True)):  #
         raise HTTPException(400, "Email is not yet verified")
     if user.disabled:
         raise HTTPException(400, "Your account is disabled")
-    user.password = hash_password(password)
+    user.password = await hash_password(password)
     await user.save()
+    invalidate_user(user.email)
     return JSONResponse(status_code=200, content={"success": True,"message": "Password reset successful"})
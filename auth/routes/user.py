@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, Response, Security
 from fastapi_jwt import JwtAuthorizationCredentials
 
 from auth.models.user import User, UserOut, UserUpdate
-from auth.jwt import access_security
+from auth.jwt import access_security, invalidate_user
 from auth.util.current_user import current_user
 
 router = APIRouter(prefix="/user", tags=["User"])
@@ -20,6 +20,7 @@ async def get_user(user: User = Depends(current_user)):  # type: ignore[no-untyp
 async def update_user(update: UserUpdate, user: User = Depends(current_user)):  # type: ignore[no-untyped-def]
     """Update allowed user fields."""
     fields = update.model_dump(exclude_unset=True)
+    old_email = user.email
     if new_email := fields.pop("email", None):
         if new_email != user.email:
             if await User.by_email(new_email) is not None:
@@ -27,6 +28,7 @@ async def update_user(update: UserUpdate, user: User = Depends(current_user)):
             user.update_email(new_email)
     user = user.model_copy(update=fields)
     await user.save()
+    invalidate_user(old_email)
     return user
 
 
@@ -36,4 +38,5 @@ async def delete_user(
 ) -> Response:
     """Delete current user."""
     await User.find_one(User.email == auth.subject["username"]).delete()
+    invalidate_user(auth.subject["username"])
     return Response(status_code=204)
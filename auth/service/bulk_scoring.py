@@ -0,0 +1,105 @@
+"""Streaming bulk scoring of CSV and NDJSON itinerary files."""
+
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Iterable, Iterator
+from itertools import islice
+from tempfile import SpooledTemporaryFile
+from typing import IO
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+
+from auth.config import CONFIG
+from auth.models.flight_record import FlightRecordIn
+from auth.service.predict_price import predict_prices
+
+FORMATS = ("csv", "ndjson")
+# What errors="replace" decodes invalid UTF-8 bytes to
+INVALID_UTF8 = "\ufffd"
+
+
+async def spool_request_body(request: Request) -> IO[bytes]:
+    """Copy the request body into a temporary file that spills to disk when large."""
+    body = SpooledTemporaryFile(max_size=CONFIG.stream_spool_size)
+    async for chunk in request.stream():
+        body.write(chunk)
+    body.seek(0)
+    return body
+
+
+async def score_file(body: IO[bytes], file_format: str) -> AsyncIterator[bytes]:
+    """Score every row of ``body`` and yield one NDJSON line per row.
+
+    Rows are parsed lazily and scored ``CONFIG.stream_chunk_size`` at a
+    time, so memory stays flat regardless of the file size. Each output
+    line carries the 1-based input row number and either the per-airline
+    predictions or the reason that row was rejected. Invalid UTF-8 rejects
+    just the rows it occurs in: the response has already started.
+    """
+    text = io.TextIOWrapper(body, encoding="utf-8", errors="replace", newline="")
+    try:
+        rows = parse_csv(text) if file_format == "csv" else parse_ndjson(text)
+        for chunk in batched(enumerate(rows, start=1), CONFIG.stream_chunk_size):
+            yield b"".join(json.dumps(line).encode() + b"\n" for line in await score_chunk(chunk))
+    finally:
+        text.close()
+
+
+async def score_chunk(chunk: list[tuple[int, FlightRecordIn | dict]]) -> list[dict]:
+    """Score the valid rows of a chunk with one model call."""
+    records = [row for _, row in chunk if isinstance(row, FlightRecordIn)]
+    # Bulk files would only churn the per-request prediction cache
+    results = iter(await predict_prices(records, use_cache=False))
+    lines = []
+    for row_number, row in chunk:
+        if not isinstance(row, FlightRecordIn):
+            lines.append({"row": row_number, "success": False, "detail": row["detail"]})
+            continue
+        predicted_prices = next(results)
+        if isinstance(predicted_prices, HTTPException):
+            lines.append({"row": row_number, "success": False, "detail": predicted_prices.detail})
+        else:
+            lines.append({"row": row_number, "success": True, "data": predicted_prices})
+    return lines
+
+
+def parse_csv(text: Iterable[str]) -> Iterator[FlightRecordIn | dict]:
+    """Parse CSV rows with a header line naming the FlightRecordIn fields."""
+    for row in csv.DictReader(text):
+        if any(INVALID_UTF8 in str(value) for value in row.values()):
+            yield {"detail": "Invalid UTF-8"}
+            continue
+        yield parse_row(row)
+
+
+def parse_ndjson(text: Iterable[str]) -> Iterator[FlightRecordIn | dict]:
+    """Parse one JSON object per line, skipping blank lines."""
+    for line in text:
+        if not line.strip():
+            continue
+        if INVALID_UTF8 in line:
+            yield {"detail": "Invalid UTF-8"}
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"detail": f"Invalid JSON: {e}"}
+            continue
+        yield parse_row(row)
+
+
+def parse_row(row: dict) -> FlightRecordIn | dict:
+    """Validate a row, returning an error detail instead of raising."""
+    try:
+        return FlightRecordIn.model_validate(row)
+    except ValidationError as e:
+        return {"detail": e.errors(include_url=False, include_context=False, include_input=False)}
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yield lists of up to ``size`` items."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
@@ -0,0 +1,174 @@
+"""Background sender draining the email outbox over one reused SMTP connection."""
+
+import asyncio
+from datetime import datetime, timedelta, UTC
+from email.message import EmailMessage
+
+import aiosmtplib
+from pymongo import ReturnDocument
+
+from auth.config import CONFIG
+from auth.models.outbox import OutboxEmail
+from auth.util.profiling import profile_task
+
+# A claimed email is retried by any worker once its lease runs out
+CLAIM_LEASE = timedelta(minutes=5)
+MAX_BACKOFF = timedelta(hours=1)
+
+
+class EmailOutbox:
+    """Queue emails in Mongo and send them from a background task.
+
+    Requests only pay for one insert. The sender claims up to
+    ``CONFIG.mail_batch_size`` due emails at a time (atomically, so several
+    workers can drain the same outbox) and sends them over a single SMTP
+    connection that is kept open until it has been idle for
+    ``CONFIG.mail_idle_timeout`` seconds. Failures are retried with
+    exponential backoff up to ``CONFIG.mail_max_attempts`` times. With
+    ``MAIL_CONSOLE`` set emails are printed instead of sent.
+    """
+
+    def __init__(self) -> None:
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._smtp: aiosmtplib.SMTP | None = None
+        self._last_used = 0.0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def enqueue(self, recipients: list[str], subject: str, html: str) -> OutboxEmail:
+        """Store an email for the sender and wake it."""
+        email = OutboxEmail(recipients=recipients, subject=subject, html=html)
+        await email.insert()
+        if self._wake is not None:
+            self._wake.set()
+        return email
+
+    def start(self) -> None:
+        if self._task is None:
+            # Created here so it belongs to the running event loop
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="email-outbox")
+
+    async def stop(self) -> None:
+        """Stop the sender; unsent emails stay in the outbox for the next start."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._disconnect()
+
+    async def _run(self) -> None:
+        while True:
+            # Cleared before draining so an enqueue during the drain is not missed
+            self._wake.clear()
+            try:
+                sent = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Email outbox error: {e!r}")
+                sent = 0
+            if sent:
+                continue
+            if self._smtp is not None and asyncio.get_running_loop().time() - self._last_used > CONFIG.mail_idle_timeout:
+                await self._disconnect()
+            # Other workers and retries are picked up by polling
+            try:
+                async with asyncio.timeout(CONFIG.mail_poll_interval):
+                    await self._wake.wait()
+            except TimeoutError:
+                pass
+
+    async def drain_once(self) -> int:
+        """Claim and send one batch of due emails; return how many were claimed."""
+        batch = []
+        while len(batch) < CONFIG.mail_batch_size:
+            email = await self._claim()
+            if email is None:
+                break
+            batch.append(email)
+        if batch:
+            with profile_task("email_outbox"):
+                for email in batch:
+                    await self._deliver(email)
+        return len(batch)
+
+    async def _claim(self) -> dict | None:
+        now = datetime.now(tz=UTC)
+        return await OutboxEmail.get_motor_collection().find_one_and_update(
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"$set": {"next_attempt_at": now + CLAIM_LEASE}, "$inc": {"attempts": 1}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _deliver(self, email: dict) -> None:
+        collection = OutboxEmail.get_motor_collection()
+        try:
+            await self._send(email)
+        except Exception as e:
+            if email["attempts"] >= CONFIG.mail_max_attempts:
+                self.failed += 1
+                update = {"status": "failed", "last_error": repr(e)}
+                print(f"Giving up on email {email['_id']} to {', '.join(email['recipients'])}: {e!r}")
+            else:
+                self.retried += 1
+                backoff = min(timedelta(seconds=CONFIG.mail_retry_delay * 2 ** (email["attempts"] - 1)), MAX_BACKOFF)
+                update = {"next_attempt_at": datetime.now(tz=UTC) + backoff, "last_error": repr(e)}
+                # A broken connection is replaced on the next attempt
+                await self._disconnect()
+            await collection.update_one({"_id": email["_id"]}, {"$set": update})
+            return
+        self.sent += 1
+        await collection.update_one(
+            {"_id": email["_id"]}, {"$set": {"status": "sent", "sent_at": datetime.now(tz=UTC), "last_error": None}}
+        )
+
+    async def _send(self, email: dict) -> None:
+        if CONFIG.mail_console:
+            print(f"Email to {', '.join(email['recipients'])}: {email['subject']}")
+            return
+        message = EmailMessage()
+        message["From"] = CONFIG.mail_sender
+        message["To"] = ", ".join(email["recipients"])
+        message["Subject"] = email["subject"]
+        message.set_content(email["html"], subtype="html")
+        smtp = await self._connect()
+        await smtp.send_message(message)
+        self._last_used = asyncio.get_running_loop().time()
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+        smtp = aiosmtplib.SMTP(
+            hostname=CONFIG.mail_server,
+            port=CONFIG.mail_port,
+            use_tls=CONFIG.mail_ssl_tls,
+            start_tls=CONFIG.mail_starttls,
+        )
+        await smtp.connect()
+        if CONFIG.mail_username:
+            await smtp.login(CONFIG.mail_username, CONFIG.mail_password)
+        self._smtp = smtp
+        return smtp
+
+    async def _disconnect(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+    async def stats(self) -> dict[str, int]:
+        """Return sender counters and the number of emails still pending."""
+        pending = await OutboxEmail.find(OutboxEmail.status == "pending").count()
+        return {"pending": pending, "sent": self.sent, "retried": self.retried, "failed": self.failed}
+
+
+email_outbox = EmailOutbox()
@@ -1,19 +1,9 @@
-from bson import ObjectId
-from fastapi import HTTPException
 from auth.models.flight_record import  FlightBookingDetails, FlightBookingRecord, FlightRecordDB
 from auth.models.user import User
 
-async def get_booking_details(user_id:str,flight_id:str,booking_details:FlightBookingRecord):
-    """Get booking details."""
-    flight_record = await FlightRecordDB.find_one(
-        FlightRecordDB.user_id == user_id, FlightRecordDB.id == ObjectId(flight_id)
-    )
-    email=booking_details.email
-    if not email:
-        email=(await User.find_one(User.id==user_id)).email
-
-    if flight_record is None:
-        raise HTTPException(404, "Flight record not found")
+def get_booking_details(user: User, flight_record: FlightRecordDB, booking_details: FlightBookingRecord) -> FlightBookingDetails:
+    """Get booking details from the already loaded user, flight and booking."""
+    email = booking_details.email or user.email
     data = {
         "booking_id": str(booking_details.id),
         "user_id": flight_record.user_id,
@@ -32,4 +22,3 @@ async def get_booking_details(user_id:str,flight_id:str,booking_details:FlightBo
         "total_price": booking_details.total_price,
     }
     return FlightBookingDetails(**data)
-    
\ No newline at end of file
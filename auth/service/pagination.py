@@ -0,0 +1,74 @@
+"""Keyset pagination on _id and streamed JSON listings."""
+
+from collections.abc import AsyncIterator
+from typing import Generic, TypeVar
+
+from beanie import Document
+from beanie.odm.queries.find import FindMany
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from typing_extensions import TypedDict
+
+from auth.util.responses import dump_json
+
+# Documents pulled from the cursor per streamed chunk
+STREAM_BATCH_SIZE = 200
+
+T = TypeVar("T")
+
+
+class Page(TypedDict, Generic[T]):
+    """A page of a listing; ``next`` is the ``after`` token of the following page."""
+
+    success: bool
+    data: list[T]
+    next: str | None
+
+
+def after_id(model: type[Document], after: str | None) -> list:
+    """Return the filter for documents after an ``after`` token, if any."""
+    if after is None:
+        return []
+    try:
+        return [model.id > ObjectId(after)]
+    except InvalidId:
+        raise HTTPException(400, f"Invalid after token {after}") from None
+
+
+async def fetch_page(query: FindMany, limit: int | None) -> tuple[list, str | None]:
+    """Return up to ``limit`` documents and the ``after`` token of the next page.
+
+    The token is None on the last page; without a limit every document is returned.
+    """
+    if limit is None:
+        return await query.to_list(), None
+    # One extra document tells us whether there is another page
+    documents = await query.limit(limit + 1).to_list()
+    if len(documents) <= limit:
+        return documents, None
+    documents = documents[:limit]
+    return documents, str(documents[-1].id)
+
+
+async def batched_cursor(query: FindMany, size: int = STREAM_BATCH_SIZE) -> AsyncIterator[list]:
+    """Iterate the query's cursor in lists of up to ``size`` documents."""
+    batch = []
+    async for document in query:
+        batch.append(document)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def stream_json(batches: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    """Yield ``{"success": true, "data": [...]}`` a batch of elements at a time."""
+    yield b'{"success": true, "data": ['
+    separator = b""
+    async for batch in batches:
+        for item in batch:
+            yield separator + dump_json(item)
+            separator = b", "
+    yield b"]}"
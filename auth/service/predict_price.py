@@ -1,55 +1,104 @@
-from auth.models.flight_record import Destination, FlightRecordIn, Source
-import datetime
+from functools import lru_cache
 
-from ml.run_model import get_predicted_price
+import numpy as np
+from fastapi import HTTPException
+
+from auth.config import CONFIG
+from auth.models.flight_record import FlightRecordIn
+from auth.service.reference_data import ReferenceSnapshot, reference_data
+from auth.service.validation import validate_flight_record
+from auth.util.cache import TTLCache
+from auth.util.metrics import Histogram
+
+from ml.features import Featurizer
+from ml.registry import ModelRegistry
+from ml.run_model import get_predicted_prices
+
+model_registry = ModelRegistry(CONFIG.model_path, CONFIG.model_check_interval, CONFIG.model_engine)
+
+prediction_cache = TTLCache(CONFIG.prediction_cache_size, CONFIG.prediction_cache_ttl)
+model_registry.add_listener(lambda _: prediction_cache.clear())
+
+PREDICT_STAGE_SECONDS = Histogram(
+    "predict_stage_seconds", "Time spent in each stage of a price prediction request", ("stage",)
+)
 
 
 async def predict_price(user_record: FlightRecordIn):
-    normalized_user_record = await get_normalized_user_record(user_record)
-    return await get_predicted_price(**normalized_user_record)
-
-
-async def get_normalized_user_record(user_record: FlightRecordIn):
-    origin = user_record.origin
-    destination = user_record.destination
-    departure_time = user_record.departure_time
-    arrival_time = user_record.arrival_time
-    duration = user_record.arrival_time - user_record.departure_time
-    transit_count = [user_record.transit_count]
-    source_array = (await Source.find_one(Source.source == origin)).array
-    destination_array = (
-        await Destination.find_one(Destination.destination == destination)
-    ).array
-
-    normalized_departure_time = time_to_array(departure_time)
-    normalized_arrival_time = time_to_array(arrival_time)
-    normalized_duration = timedelta_to_array(duration)
-
-    journey_date = datetime_to_array(departure_time)
-
-    return {
-        "transit_count": transit_count,
-        "journey_date": journey_date,
-        "departure": normalized_departure_time,
-        "arrival": normalized_arrival_time,
-        "source": source_array,
-        "destination": destination_array,
-        "duration": normalized_duration,
-    }
-
-
-def datetime_to_array(dt: datetime.datetime):
-    """Convert datetime object to list of day,month"""
-    return [dt.day, dt.month]
-
-
-def time_to_array(time: datetime) -> list:
-    return [time.hour, time.minute]
-
-
-def timedelta_to_array(td: datetime.timedelta) -> list:
-    """Convert timedelta object to list of hour,minute"""
-    seconds = td.total_seconds()
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    return [hours, minutes]
+    predicted_prices = (await predict_prices([user_record]))[0]
+    if isinstance(predicted_prices, HTTPException):
+        raise predicted_prices
+    return predicted_prices
+
+
+async def predict_prices(
+    user_records: list[FlightRecordIn], use_cache: bool = True
+) -> list[list[dict] | HTTPException]:
+    """Predict every airline's price for many itineraries with one model call.
+
+    Items that fail normalization get their HTTPException in place of a
+    result so one bad itinerary does not fail the whole batch.
+    """
+    with PREDICT_STAGE_SECONDS.time("reference"):
+        reference = await reference_data.get()
+        model = await model_registry.get_async()
+    results: list[list[dict] | HTTPException | None] = [None] * len(user_records)
+    pending: dict[tuple, list[int]] = {}
+    pending_records = []
+    with PREDICT_STAGE_SECONDS.time("normalize"):
+        for index, user_record in enumerate(user_records):
+            try:
+                normalized_user_record = get_normalized_user_record(user_record, reference, model.featurizer)
+            except HTTPException as e:
+                results[index] = e
+                continue
+            key = prediction_cache_key(model.version, reference.version, normalized_user_record)
+            if key in pending:
+                pending[key].append(index)
+                continue
+            cached = prediction_cache.get(key) if use_cache else None
+            if cached is not None:
+                results[index] = cached
+                continue
+            pending[key] = [index]
+            pending_records.append(normalized_user_record)
+
+    if pending_records:
+        with PREDICT_STAGE_SECONDS.time("inference"):
+            scored = await get_predicted_prices(
+                model.predictor,
+                model.featurizer,
+                scored_airlines(model.featurizer, reference.airlines),
+                np.stack(pending_records),
+            )
+        for (key, indices), predicted_prices in zip(pending.items(), scored):
+            if use_cache:
+                prediction_cache.set(key, predicted_prices)
+            for index in indices:
+                results[index] = predicted_prices
+    return results
+
+
+def prediction_cache_key(model_version: str, reference_version: int, normalized_user_record: np.ndarray) -> tuple:
+    """Key a prediction on the model, the airline set and the normalized features."""
+    return (model_version, reference_version, normalized_user_record.tobytes())
+
+
+def get_normalized_user_record(
+    user_record: FlightRecordIn, reference: ReferenceSnapshot, featurizer: Featurizer
+) -> np.ndarray:
+    """Validate an itinerary against the reference data and encode it as a feature row."""
+    validate_flight_record(user_record, reference)
+    try:
+        return featurizer.encode_itinerary(user_record)
+    except ValueError as e:
+        raise HTTPException(400, str(e)) from None
+
+
+@lru_cache(maxsize=8)
+def scored_airlines(featurizer: Featurizer, airlines: tuple[str, ...]) -> tuple[str, ...]:
+    """The reference airlines the model has a column (or the baseline) for."""
+    unknown = [airline for airline in airlines if airline not in featurizer.airlines]
+    if unknown:
+        print(f"Skipping airlines unknown to the model: {', '.join(unknown)}")
+    return tuple(airline for airline in airlines if airline in featurizer.airlines)
@@ -0,0 +1,144 @@
+"""Prediction log writes, optionally buffered and flushed in bulk."""
+
+import asyncio
+from collections import deque
+
+from beanie import PydanticObjectId
+from pymongo.errors import BulkWriteError
+
+from auth.config import CONFIG
+from auth.models.flight_record import FlightRecordDB
+from auth.util.profiling import profile_task
+
+DUPLICATE_KEY = 11000
+
+
+class PredictionLog:
+    """Save prediction logs, either inline or through a write-behind buffer.
+
+    Ids are generated client-side either way, so callers can respond
+    with them before anything reaches Mongo. With ``write_behind`` the
+    documents of many requests are buffered and written by a background
+    task in unordered bulk inserts of up to ``flush_size``, at least every
+    ``flush_interval`` seconds. When ``max_size`` documents are waiting,
+    ``save`` blocks until a flush makes room. A record may not be readable
+    (e.g. for booking) until its batch is flushed.
+    """
+
+    def __init__(self, write_behind: bool, flush_size: int, flush_interval: float, max_size: int) -> None:
+        self.write_behind = write_behind
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_size = max(max_size, flush_size)
+        self._buffer: deque[FlightRecordDB] = deque()
+        self._changed: asyncio.Condition | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.blocked = 0
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    async def save(self, documents: list[FlightRecordDB]) -> None:
+        """Assign ids and write the documents, or queue them for the next flush."""
+        for document in documents:
+            document.id = PydanticObjectId()
+        # Written inline unless the flusher is running
+        if self._changed is None or len(documents) > self.max_size:
+            if documents:
+                await FlightRecordDB.insert_many(documents)
+            return
+        async with self._changed:
+            if len(self._buffer) + len(documents) > self.max_size:
+                self.blocked += 1
+                self._changed.notify_all()
+                await self._changed.wait_for(lambda: len(self._buffer) + len(documents) <= self.max_size)
+            self._buffer.extend(documents)
+            if len(self._buffer) >= self.flush_size:
+                self._changed.notify_all()
+
+    def start(self) -> None:
+        if self.write_behind and self._task is None:
+            # Created here so it belongs to the running event loop
+            self._changed = asyncio.Condition()
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="prediction-log")
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out whatever is still buffered."""
+        if self._task is not None:
+            # Let an in-flight flush finish rather than cancel it halfway
+            self._stopping = True
+            async with self._changed:
+                self._changed.notify_all()
+            await self._task
+            self._task = None
+        while self._buffer:
+            if not await self.flush():
+                print(f"Dropping {len(self._buffer)} prediction logs that could not be written")
+                self._buffer.clear()
+        self._changed = None
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            async with self._changed:
+                try:
+                    async with asyncio.timeout(self.flush_interval):
+                        await self._changed.wait_for(lambda: self._stopping or len(self._buffer) >= self.flush_size)
+                except TimeoutError:
+                    pass
+            while self._buffer and not self._stopping:
+                if not await self.flush():
+                    await asyncio.sleep(self.flush_interval)
+                    break
+                if len(self._buffer) < self.flush_size:
+                    break
+
+    async def flush(self) -> bool:
+        """Write up to ``flush_size`` buffered documents; False if the write failed."""
+        batch = [self._buffer.popleft() for _ in range(min(self.flush_size, len(self._buffer)))]
+        if not batch:
+            return True
+        try:
+            with profile_task("prediction_log"):
+                await FlightRecordDB.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # A retried batch may have been partly written already
+            if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+                return self._failed(batch, e)
+        except Exception as e:
+            return self._failed(batch, e)
+        self.written += len(batch)
+        self.flushes += 1
+        if self._changed is not None:
+            async with self._changed:
+                self._changed.notify_all()
+        return True
+
+    def _failed(self, batch: list[FlightRecordDB], error: Exception) -> bool:
+        print(f"Prediction log flush of {len(batch)} documents failed: {error!r}")
+        self.failed_flushes += 1
+        self._buffer.extendleft(reversed(batch))
+        return False
+
+    def stats(self) -> dict[str, int]:
+        """Return buffer occupancy and flush counters."""
+        return {
+            "buffered": len(self._buffer),
+            "max_size": self.max_size,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "blocked": self.blocked,
+        }
+
+
+prediction_log = PredictionLog(
+    CONFIG.prediction_log_write_behind,
+    CONFIG.prediction_log_flush_size,
+    CONFIG.prediction_log_flush_interval,
+    CONFIG.prediction_log_buffer_size,
+)
@@ -0,0 +1,102 @@
+"""In-process cache of the source, destination and airline collections."""
+
+import asyncio
+import time
+from dataclasses import dataclass, replace
+
+from fastapi import HTTPException
+
+from auth.config import CONFIG
+from auth.models.flight_record import Airline, Destination, Source
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """An immutable view of the reference collections."""
+
+    version: int = 0
+    sources: tuple[str, ...] = ()
+    destinations: tuple[str, ...] = ()
+    airlines: tuple[str, ...] = ()
+
+    def check_source(self, source: str) -> None:
+        """Reject an origin that is not offered."""
+        if source not in self.sources:
+            raise HTTPException(400, f"Origin {source} is not a valid source")
+
+    def check_destination(self, destination: str) -> None:
+        """Reject a destination that is not offered."""
+        if destination not in self.destinations:
+            raise HTTPException(400, f"Destination {destination} is not a valid destination")
+
+
+class ReferenceData:
+    """Cache the reference collections and refresh them on an interval.
+
+    Writes through the dataset routes refresh this worker immediately;
+    other gunicorn workers pick the change up once their snapshot is older
+    than ``refresh_interval`` seconds. A stale snapshot keeps being served
+    while a single background task reloads it, so requests never wait on
+    Mongo once a snapshot exists. The version only moves when the content
+    actually changes.
+    """
+
+    def __init__(self, refresh_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+        self._snapshot = ReferenceSnapshot()
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+        self._refreshing: asyncio.Task | None = None
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    async def get(self) -> ReferenceSnapshot:
+        """Return the current snapshot, refreshing it in the background if it is stale."""
+        if self._loaded_at is None:
+            # Nothing to serve yet
+            return await self.refresh()
+        if self._is_stale() and self._refreshing is None:
+            self._refreshing = asyncio.create_task(self._background_refresh())
+        return self._snapshot
+
+    async def refresh(self) -> ReferenceSnapshot:
+        """Reload the collections now."""
+        async with self._lock:
+            await self._refresh()
+        return self._snapshot
+
+    async def _background_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"Reference data refresh failed, keeping version {self.version}: {e!r}")
+            # Retry after another interval rather than on every request
+            self._loaded_at = time.monotonic()
+        finally:
+            self._refreshing = None
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval
+
+    async def _refresh(self) -> None:
+        sources, destinations, airlines = await asyncio.gather(
+            Source.find().to_list(),
+            Destination.find().to_list(),
+            Airline.find().to_list(),
+        )
+        current = self._snapshot
+        snapshot = ReferenceSnapshot(
+            version=current.version,
+            sources=tuple(source.source for source in sources),
+            destinations=tuple(destination.destination for destination in destinations),
+            airlines=tuple(airline.airline for airline in airlines),
+        )
+        if snapshot != current:
+            snapshot = replace(snapshot, version=current.version + 1)
+        self._snapshot = snapshot
+        self._loaded_at = time.monotonic()
+
+
+reference_data = ReferenceData(CONFIG.reference_refresh_interval)
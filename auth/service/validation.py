@@ -0,0 +1,30 @@
+"""Validation that needs reference data or other documents.
+
+Pydantic validators on the models stay pure. Checks against the
+reference collections use the in-memory snapshot, and fields derived
+from other documents are resolved here, asynchronously, before the model
+is built.
+"""
+
+from fastapi import HTTPException
+
+from auth.models.flight_record import FlightBookingInput, FlightBookingRecord, FlightRecordDB, FlightRecordIn
+from auth.service.reference_data import ReferenceSnapshot
+
+
+def validate_flight_record(record: FlightRecordIn, reference: ReferenceSnapshot) -> None:
+    """Reject an itinerary whose origin or destination is not offered."""
+    reference.check_source(record.origin)
+    reference.check_destination(record.destination)
+
+
+async def build_booking_record(
+    flight_booking: FlightBookingInput, flight_record: FlightRecordDB | None = None
+) -> FlightBookingRecord:
+    """Build a booking with its total price resolved from the booked flight."""
+    if flight_record is None:
+        flight_record = await FlightRecordDB.get(flight_booking.flight_id)
+        if flight_record is None:
+            raise HTTPException(404, "Flight record not found")
+    total_price = flight_record.predicted_price * flight_booking.quantity
+    return FlightBookingRecord(**flight_booking.model_dump(), total_price=total_price)
@@ -1,23 +1,12 @@
-"""Mail server config."""
+"""Email templates."""
 
 import datetime
-from fastapi_mail import FastMail, ConnectionConfig, MessageSchema, MessageType
 
 from auth.config import CONFIG
 from auth.models.flight_record import FlightBookingDetails
+from auth.service.email_outbox import email_outbox
 
-mail_conf = ConnectionConfig(
-    MAIL_USERNAME=CONFIG.mail_username,
-    MAIL_PASSWORD=CONFIG.mail_password,
-    MAIL_FROM=CONFIG.mail_sender,
-    MAIL_PORT=CONFIG.mail_port,
-    MAIL_SERVER=CONFIG.mail_server,
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-)
-
-mail = FastMail(mail_conf)
+# Emails are queued in the outbox and sent by its background worker
 
 async def send_verification_email(email: str, token: str) -> None:
     """Send user verification email."""
@@ -26,10 +15,10 @@ async def send_verification_email(email: str, token: str) -> None:
         if CONFIG.mail_console:
             print("POST to " + url)
         else:
-            message = MessageSchema(
+            await email_outbox.enqueue(
                 recipients=[email],
                 subject="Verify Your Email - Flight Price Prediction App",
-                body=f'''
+                html=f'''
                 <html>
                   <head>
                     <style>
@@ -55,9 +44,7 @@ async def send_verification_email(email: str, token: str) -> None:
                   </body>
                 </html>
                 ''',
-                subtype=MessageType.html,
             )
-            await mail.send_message(message)
     except Exception as e:
         print(e)
 
@@ -66,10 +53,10 @@ async def send_password_reset_email(email: str, token: str) -> None:
     # Change this later to public endpoint
     url = "http://localhost:5173/reset-password?token=" + token
     try:
-        message = MessageSchema(
+        await email_outbox.enqueue(
             recipients=[email],
             subject="MyServer Password Reset",
-            body=f'''
+            html=f'''
             <html>
               <head>
                 <style>
@@ -94,9 +81,7 @@ async def send_password_reset_email(email: str, token: str) -> None:
               </body>
             </html>
             ''',
-            subtype=MessageType.html,
         )
-        await mail.send_message(message)
     except Exception as e:
         print(e)
     
@@ -184,17 +169,13 @@ async def send_booking_email(flight_record: FlightBookingDetails) -> None:
     </html>
     """
 
-    # Create the email message
-    message = MessageSchema(
+    # Queue the email
+    await email_outbox.enqueue(
         recipients=[flight_record.email],
         subject="Flight Booked - Flight Price Prediction App",
-        body=email_body,
-        subtype=MessageType.html,  # Use HTML for rich formatting
+        html=email_body,
     )
 
-    # Send the email
-    await mail.send_message(message)
-
 async def send_cancellation_email(flight_record: FlightBookingDetails) -> None:
     # Format the departure and arrival times for better readability
     departure_time = flight_record.departure_time.strftime("%Y-%m-%d %H:%M")
@@ -276,13 +257,9 @@ async def send_cancellation_email(flight_record: FlightBookingDetails) -> None:
     </html>
     """
 
-    # Create the email message
-    message = MessageSchema(
+    # Queue the email
+    await email_outbox.enqueue(
         recipients=[flight_record.email],
         subject="Flight Cancellation - Flight Price Prediction App",
-        body=email_body,
-        subtype=MessageType.html,  # Use HTML for rich formatting
+        html=email_body,
     )
-
-    # Send the email
-    await mail.send_message(message)
\ No newline at end of file
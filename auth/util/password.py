@@ -1,10 +1,114 @@
 """Password utility functions."""
 
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
 import bcrypt
+from fastapi import HTTPException
 
 from auth.config import CONFIG
+from auth.util.metrics import Histogram
+
+HASH_SECONDS = Histogram("password_hash_seconds", "Time bcrypt spent per hash or check")
+HASH_QUEUE_WAIT_SECONDS = Histogram("password_hash_queue_wait_seconds", "Time a hash waited for a pool thread")
+
+
+class PasswordHasher:
+    """Run bcrypt on a dedicated, bounded thread pool instead of the event loop.
+
+    At most ``max_workers`` hashes run at once and at most ``max_queue``
+    more wait for a thread; further calls are rejected with a 503 rather
+    than piling up behind a burst of logins. bcrypt releases the GIL, so
+    the event loop keeps serving other requests while a hash runs. The
+    pool is started on first use, so it comes back after ``shutdown``.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending = 0
+        self.calls = 0
+        self.rejected = 0
+        self.hash_seconds = 0.0
+        self.hash_seconds_max = 0.0
+        self.queue_wait_seconds = 0.0
+        self.queue_wait_seconds_max = 0.0
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run ``func(*args)`` on the pool, recording queue wait and hash time."""
+        if self._pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(503, "Too many password requests, try again shortly", headers={"Retry-After": "1"})
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="bcrypt")
+        self._pending += 1
+        try:
+            result, queue_wait, elapsed = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _timed, func, time.perf_counter(), *args
+            )
+        finally:
+            self._pending -= 1
+        self.calls += 1
+        self.hash_seconds += elapsed
+        self.hash_seconds_max = max(self.hash_seconds_max, elapsed)
+        self.queue_wait_seconds += queue_wait
+        self.queue_wait_seconds_max = max(self.queue_wait_seconds_max, queue_wait)
+        HASH_SECONDS.observe(elapsed)
+        HASH_QUEUE_WAIT_SECONDS.observe(queue_wait)
+        return result
+
+    @property
+    def queued(self) -> int:
+        return max(self._pending - self.max_workers, 0)
+
+    @property
+    def running(self) -> int:
+        return min(self._pending, self.max_workers)
 
+    def stats(self) -> dict[str, float]:
+        """Return pool occupancy and hash latency / queue wait totals."""
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queued": self.queued,
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "hash_seconds": self.hash_seconds,
+            "hash_seconds_max": self.hash_seconds_max,
+            "queue_wait_seconds": self.queue_wait_seconds,
+            "queue_wait_seconds_max": self.queue_wait_seconds_max,
+        }
 
-def hash_password(password: str) -> str:
+    def shutdown(self) -> None:
+        """Stop the pool threads; the next call starts a new pool."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def _timed(func: Callable[..., Any], queued_at: float, *args: Any) -> tuple[Any, float, float]:
+    # Runs on a pool thread; the counters are updated back on the event loop
+    started = time.perf_counter()
+    result = func(*args)
+    return result, started - queued_at, time.perf_counter() - started
+
+
+password_hasher = PasswordHasher(
+    CONFIG.password_hash_workers or min(os.cpu_count() or 1, 4), CONFIG.password_hash_queue
+)
+
+
+async def hash_password(password: str) -> str:
     """Return a salted password hash."""
-    return bcrypt.hashpw(password.encode(), CONFIG.salt).decode()
+    hashed = await password_hasher.run(bcrypt.hashpw, password.encode(), CONFIG.salt)
+    return hashed.decode()
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    """Check a password against a stored hash in constant time."""
+    return await password_hasher.run(bcrypt.checkpw, password.encode(), hashed.encode())
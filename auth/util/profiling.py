@@ -0,0 +1,182 @@
+"""Opt-in profiling of single requests and background task runs.
+
+Profiles are written to ``CONFIG.profile_dir``. The default sampling mode
+records every thread's stack each ``CONFIG.profile_interval`` seconds and
+writes collapsed stacks (``thread;outer;...;inner count`` per line), which
+flamegraph.pl, speedscope or inferno render as a flame graph. ``cprofile``
+mode writes a pstats ``.prof`` file of the event loop thread instead.
+
+Profiling observes the whole process while it runs, so concurrent
+requests show up too. Only one profile runs at a time and at most
+``CONFIG.profile_rate_limit`` start per minute.
+"""
+
+import cProfile
+import hmac
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from starlette.responses import JSONResponse
+
+from auth.config import CONFIG
+
+MODES = ("sample", "cprofile")
+
+
+class StackSampler:
+    """Sample the stacks of all other threads from a background thread."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                # Idle pool threads only add noise
+                if frames[0].startswith("_worker (thread.py"):
+                    continue
+                frames.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(frames))] += 1
+
+
+class ProfileLimiter:
+    """Allow one profile at a time and at most ``per_minute`` starts per minute."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.per_minute = per_minute
+        self._started: deque[float] = deque()
+        self._active = False
+
+    def acquire(self) -> bool:
+        now = time.monotonic()
+        while self._started and now - self._started[0] >= 60:
+            self._started.popleft()
+        if self._active or len(self._started) >= self.per_minute:
+            return False
+        self._started.append(now)
+        self._active = True
+        return True
+
+    def release(self) -> None:
+        self._active = False
+
+
+limiter = ProfileLimiter(CONFIG.profile_rate_limit)
+_sequence = itertools.count()
+
+
+def profile_path(label: str, mode: str) -> Path:
+    """Return a new file path in the profile directory for ``label``."""
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_")
+    suffix = ".prof" if mode == "cprofile" else ".collapsed"
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    return Path(CONFIG.profile_dir) / f"{stamp}-{slug}-{os.getpid()}-{next(_sequence)}{suffix}"
+
+
+@contextmanager
+def profile(label: str, mode: str = "sample") -> Iterator[Path | None]:
+    """Profile the enclosed block; yields the output path, or None if rate limited."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown profile mode {mode!r}, expected one of {MODES}")
+    if not limiter.acquire():
+        yield None
+        return
+    path = profile_path(label, mode)
+    sampler = profiler = None
+    try:
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            sampler = StackSampler(CONFIG.profile_interval)
+            sampler.start()
+        yield path
+    finally:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(path)
+            else:
+                stacks = sampler.stop()
+                path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+            print(f"Wrote profile {path}")
+        finally:
+            limiter.release()
+
+
+def profile_task(label: str):  # type: ignore[no-untyped-def]
+    """Profile a background task run if ``label`` is listed in PROFILE_TASKS."""
+    if label in CONFIG.profile_tasks:
+        return profile(label)
+    return nullcontext()
+
+
+class ProfilingMiddleware:
+    """Profile requests that carry the admin profile token.
+
+    Send the token in an ``X-Profile`` header or a ``profile`` query
+    parameter, and optionally ``X-Profile-Mode: cprofile``. The response
+    names the written file in ``X-Profile-File``, or says ``X-Profile:
+    rate-limited``. An unknown mode is rejected with a 400. Without
+    ``PROFILE_TOKEN`` set profiling is disabled.
+    """
+
+    def __init__(self, app) -> None:  # type: ignore[no-untyped-def]
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:  # type: ignore[no-untyped-def]
+        if scope["type"] != "http" or not CONFIG.profile_token or not self._authorized(scope):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        mode = headers.get(b"x-profile-mode", b"sample").decode()
+        if mode not in MODES:
+            response = JSONResponse({"detail": f"Unknown X-Profile-Mode {mode}, expected one of {', '.join(MODES)}"}, 400)
+            await response(scope, receive, send)
+            return
+        with profile(f"{scope['method']} {scope['path']}", mode) as path:
+
+            async def send_wrapper(message) -> None:  # type: ignore[no-untyped-def]
+                if message["type"] == "http.response.start":
+                    header = (b"x-profile-file", path.name.encode()) if path else (b"x-profile", b"rate-limited")
+                    message = {**message, "headers": [*message.get("headers", []), header]}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _authorized(scope) -> bool:  # type: ignore[no-untyped-def]
+        token = dict(scope["headers"]).get(b"x-profile", b"").decode()
+        if not token and b"profile" in scope.get("query_string", b""):
+            token = parse_qs(scope["query_string"].decode()).get("profile", [""])[0]
+        return bool(token) and hmac.compare_digest(token, CONFIG.profile_token)
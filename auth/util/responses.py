@@ -0,0 +1,46 @@
+"""Fast JSON responses."""
+
+from functools import lru_cache
+from typing import Any
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+
+def _fallback(value: Any) -> Any:
+    # pydantic-core handles models, datetimes and containers itself
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@lru_cache(maxsize=64)
+def json_adapter(schema: Any) -> TypeAdapter:
+    """Return a cached TypeAdapter; building one compiles a serializer."""
+    return TypeAdapter(schema)
+
+
+def dump_json(content: Any, schema: Any = None, by_alias: bool = True) -> bytes:
+    """Serialize in one pass, with a prebuilt serializer when ``schema`` is given."""
+    if schema is not None:
+        return json_adapter(schema).dump_json(content, by_alias=by_alias)
+    return to_json(content, by_alias=by_alias, fallback=_fallback)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serialized by pydantic-core.
+
+    Documents, models, dicts, datetimes and ObjectIds go straight to JSON
+    bytes; there is no need to model_dump or jsonable_encoder them first.
+    ``by_alias=False`` serializes a document's ``_id`` as ``id``.
+    """
+
+    def __init__(self, content: Any, status_code: int = 200, *, schema: Any = None, by_alias: bool = True, **kwargs: Any) -> None:
+        self.schema = schema
+        self.by_alias = by_alias
+        super().__init__(content, status_code, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content, self.schema, self.by_alias)
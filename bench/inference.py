@@ -0,0 +1,183 @@
+"""Micro-benchmarks of the inference path with regression thresholds.
+
+Times model loading, feature construction
+(``get_normalized_user_record`` and ``Featurizer.encode_itineraries``)
+and ``get_predicted_price`` / ``get_predicted_prices`` for a single
+itinerary and batches of itineraries. Each case is timed for every
+``--engines`` choice and reports its median time per call and peak
+traced memory.
+
+Usage::
+
+    python -m bench.inference --model ml/flight_price_rf.pkl --output bench_inference.json
+    python -m bench.inference --model ml/flight_price_rf.pkl --compare bench_inference.json
+
+``--compare`` exits non-zero when a case is slower than its baseline by
+more than ``--tolerance``, or its peak memory is above the baseline by
+more than ``--memory-tolerance``. Compare runs only on the machine that
+wrote the baseline.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+import sklearn
+
+from bench.load import itineraries, load_dump
+
+BATCH_SIZES = (1, 8, 64, 256)
+
+
+def measure(function: Callable[[], object], repeat: int, min_time: float) -> dict[str, float | int]:
+    """Time ``function`` and trace its peak memory in a separate run."""
+    # The model registry logs every load
+    with contextlib.redirect_stdout(io.StringIO()):
+        timer = timeit.Timer(function)
+        number = 1
+        while (seconds := timer.timeit(number)) < min_time:
+            number *= 2 if seconds * 10 > min_time else 10
+        per_call = [seconds / number] + [timer.timeit(number) / number for _ in range(repeat - 1)]
+        # Traced separately: tracemalloc slows Python code down
+        tracemalloc.start()
+        try:
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {
+        "seconds": statistics.median(per_call),
+        "min_seconds": min(per_call),
+        "number": number,
+        "peak_bytes": peak,
+    }
+
+
+def cases(args: argparse.Namespace) -> dict[str, Callable[[], object]]:
+    """Build the benchmark cases, keyed by name."""
+    from auth.models.flight_record import FlightRecordIn
+    from auth.service.predict_price import get_normalized_user_record, scored_airlines
+    from auth.service.reference_data import ReferenceSnapshot
+    from ml.registry import ModelRegistry
+    from ml.run_model import get_predicted_price, get_predicted_prices
+
+    dump = load_dump()
+    reference = ReferenceSnapshot(
+        version=1,
+        sources=tuple(doc["source"] for doc in dump["sources"]),
+        destinations=tuple(doc["destination"] for doc in dump["destinations"]),
+        airlines=tuple(doc["airline"] for doc in dump["airlines"]),
+    )
+    records = [FlightRecordIn.model_validate(record) for record in itineraries(dump, max(BATCH_SIZES), random.Random(args.seed))]
+    loop = asyncio.new_event_loop()
+
+    selected: dict[str, Callable[[], object]] = {}
+    for engine in args.engines:
+        registry = ModelRegistry(args.model, engine=engine)
+        selected[f"load/{engine}"] = registry.load
+    model = registry.load()
+    featurizer = model.featurizer
+    airlines = scored_airlines(featurizer, reference.airlines)
+
+    selected["features/normalize"] = lambda: get_normalized_user_record(records[0], reference, featurizer)
+    for size in BATCH_SIZES[1:]:
+        selected[f"features/encode/batch={size}"] = lambda size=size: featurizer.encode_itineraries(records[:size])
+
+    rows = featurizer.encode_itineraries(records)
+    for engine in args.engines:
+        predictor = ModelRegistry(args.model, engine=engine).load().predictor
+        selected[f"predict/{engine}/single"] = lambda predictor=predictor: loop.run_until_complete(
+            get_predicted_price(predictor, featurizer, airlines, rows[0])
+        )
+        for size in BATCH_SIZES[1:]:
+            selected[f"predict/{engine}/batch={size}"] = lambda predictor=predictor, size=size: loop.run_until_complete(
+                get_predicted_prices(predictor, featurizer, airlines, rows[:size])
+            )
+    return selected
+
+
+def compare(results: dict, baseline: dict, tolerance: float, memory_tolerance: float) -> list[str]:
+    """Return a line per case that got slower or bigger than its baseline allows."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["seconds"] > base["seconds"] * (1 + tolerance):
+            regressions.append(f"{name}: {format_seconds(result['seconds'])}, baseline {format_seconds(base['seconds'])}")
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + memory_tolerance):
+            regressions.append(f"{name}: peak {result['peak_bytes']} bytes, baseline {base['peak_bytes']}")
+    return regressions
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="ml/flight_price_rf.pkl", help="pickled model artifact")
+    parser.add_argument("--engines", type=lambda value: value.split(","), default=["sklearn", "flat"], help="comma separated model engines")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds per case")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per round")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="fail if results regress against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional slowdown (default %(default)s)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed fractional peak memory growth (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    # Settings are read on import, so these must be in place before auth is imported
+    os.environ.setdefault("MONGO_URI", "mongodb://unused")
+    os.environ.setdefault("SECRET_KEY", "bench")
+
+    results = {}
+    for name, function in cases(args).items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(function, args.repeat, args.min_time)
+        result = results[name]
+        print(f"{name:32} {format_seconds(result['seconds']):>10}  min {format_seconds(result['min_seconds']):>10}  peak {result['peak_bytes'] / 2**20:8.2f} MiB")
+
+    report = {
+        "created_at": datetime.now(tz=UTC).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "cpus": os.cpu_count(),
+        "model": args.model,
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.output}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["results"]
+        regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""HTTP load test of the predict, book, logs and login endpoints.
+
+Boots ``auth.app:app`` in process, with its lifespan, against an in-memory
+Mongo (mongomock-motor) or a local ``mongod``, and seeds the reference
+collections from ``dump/flight_price_predictor/*.bson``. Each scenario
+sends ``--requests`` requests through ``--concurrency`` workers and
+reports throughput and p50/p95/p99 latency.
+
+Usage::
+
+    pip install mongomock-motor
+    python -m bench.load --requests 500 --concurrency 16 --output bench_baseline.json
+    python -m bench.load --requests 500 --concurrency 16 --compare bench_baseline.json
+    python -m bench.load --mongo mongodb://localhost:27017 --scenarios predict,logs
+
+A ``--mongo`` server gets a bench user and its flight records written to
+the ``flight_price_predictor`` database: use a throwaway instance.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+DUMP_DIR = Path(__file__).resolve().parent.parent / "dump" / "flight_price_predictor"
+REFERENCE_COLLECTIONS = ("sources", "destinations", "airlines")
+SCENARIOS = ("login", "predict", "book", "logs")
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+def load_dump() -> dict[str, list[dict]]:
+    """Read the reference collections from the mongodump ``.bson`` files."""
+    import bson
+
+    return {name: list(bson.decode_file_iter((DUMP_DIR / f"{name}.bson").open("rb"))) for name in REFERENCE_COLLECTIONS}
+
+
+def mongo_client(uri: str | None):  # type: ignore[no-untyped-def]
+    """Return an in-memory client when ``uri`` is None, else a Motor client."""
+    if uri is None:
+        # mongomock-motor is only needed for the in-memory stand-in
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError as e:
+            raise SystemExit("The in-memory Mongo needs mongomock-motor: pip install mongomock-motor, or pass --mongo") from e
+        return AsyncMongoMockClient()
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    return AsyncIOMotorClient(uri)
+
+
+async def seed(db, dump: dict[str, list[dict]]) -> None:  # type: ignore[no-untyped-def]
+    """Restore the reference collections that are empty."""
+    for name, docs in dump.items():
+        if docs and not await db[name].count_documents({}):
+            await db[name].insert_many(docs)
+
+
+def itineraries(dump: dict[str, list[dict]], count: int, rng: random.Random) -> list[dict]:
+    """Random itineraries between the seeded sources and destinations."""
+    sources = [doc["source"] for doc in dump["sources"]]
+    destinations = [doc["destination"] for doc in dump["destinations"]]
+    records = []
+    for _ in range(count):
+        departure = datetime(2025, 1, 1) + timedelta(days=rng.randrange(365), minutes=5 * rng.randrange(288))
+        arrival = departure + timedelta(minutes=5 * rng.randrange(12, 300))
+        records.append(
+            {
+                "origin": rng.choice(sources),
+                "destination": rng.choice(destinations),
+                "departure_time": departure.isoformat(),
+                "arrival_time": arrival.isoformat(),
+                "transit_count": rng.randrange(3),
+            }
+        )
+    return records
+
+
+async def measure(
+    name: str, requests: int, concurrency: int, send: Callable[[int], Awaitable]
+) -> dict[str, float | int]:
+    """Send ``requests`` requests from ``concurrency`` workers and summarize their latency."""
+    latencies: list[float] = []
+    errors = 0
+    indices = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in indices:
+            start = time.perf_counter()
+            try:
+                response = await send(index)
+                failed = response.status_code >= 400
+            except Exception as e:
+                print(f"{name} request failed: {e!r}")
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "throughput": round(requests / seconds, 1),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Boot the app, run the selected scenarios and return their results."""
+    import httpx
+
+    dump = load_dump()
+    client = mongo_client(args.mongo)
+    await seed(client.flight_price_predictor, dump)
+
+    import auth.app
+    from auth.models.user import User
+    from auth.util.password import hash_password
+
+    # The lifespan connects with whatever client we hand it
+    auth.app.AsyncIOMotorClient = lambda uri, **kwargs: client  # type: ignore[assignment,misc]
+    app = auth.app.app
+    rng = random.Random(args.seed)
+    records = itineraries(dump, args.itineraries, rng)
+    warmup = args.warmup
+    results = {}
+
+    async with app.router.lifespan_context(app):
+        user = await User.by_email(BENCH_EMAIL)
+        if user is None:
+            user = User(email=BENCH_EMAIL, password="")
+        user.password = await hash_password(BENCH_PASSWORD)
+        user.email_confirmed_at = datetime.now(tz=UTC)
+        await user.save()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as http:
+            credentials = {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+            response = await http.post("/auth/login", json=credentials)
+            response.raise_for_status()
+            http.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+            def predict(index: int) -> Awaitable:
+                return http.post("/flight/predict", json=records[index % len(records)])
+
+            flight_ids: list[str] = []
+
+            def book(index: int) -> Awaitable:
+                booking = {"flight_id": flight_ids[index], "user_name": "Bench", "phone_number": "9800000000"}
+                return http.post("/flight/book", json=booking)
+
+            scenarios: dict[str, Callable[[int], Awaitable]] = {
+                "login": lambda index: http.post("/auth/login", json=credentials),
+                "predict": predict,
+                "book": book,
+                "logs": lambda index: http.post("/flight/logs", params={"limit": args.page_size}),
+            }
+            for name in args.scenarios:
+                send = scenarios[name]
+                if name == "book":
+                    # One unbooked flight per booking, predicted outside the timed run
+                    for index in range(args.requests + warmup):
+                        response = await predict(index)
+                        flight_ids.append(response.json()["data"][0]["id"])
+                for index in range(warmup):
+                    await send(args.requests + index)
+                results[name] = await measure(name, args.requests, args.concurrency, send)
+                print(f"{name:8} {format_result(results[name])}")
+    return results
+
+
+def format_result(result: dict) -> str:
+    return (
+        f"{result['throughput']:8.1f} req/s  p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms"
+        f"  p99 {result['p99_ms']:7.2f} ms  errors {result['errors']}"
+    )
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a line per scenario whose throughput or latency regressed beyond ``tolerance``."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['throughput']} req/s, baseline {base['throughput']}")
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if result[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {result[key]}, baseline {base[key]}")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{name}: {result['errors']} errors, baseline {base['errors']}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo", metavar="URI", help="local MongoDB to use instead of the in-memory stand-in")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS), help="comma separated subset of %(default)s")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests per scenario")
+    parser.add_argument("--itineraries", type=int, default=100, help="distinct itineraries to predict, cycled")
+    parser.add_argument("--page-size", type=int, default=50, help="limit for /flight/logs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="fail if results regress against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed fractional regression (default %(default)s)")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios {', '.join(sorted(unknown))}")
+
+    # Settings are read on import, so these must be in place before auth is imported
+    os.environ.setdefault("MONGO_URI", args.mongo or "mongodb://in-memory")
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("MAIL_CONSOLE", "True")
+
+    results = asyncio.run(run(args))
+    report = {
+        "created_at": datetime.now(tz=UTC).isoformat(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "mongo": "local" if args.mongo else "in-memory",
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.output}")
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text())["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
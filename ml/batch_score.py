@@ -0,0 +1,169 @@
+"""Score spreadsheet, CSV or Parquet flight datasets offline.
+
+Usage::
+
+    python -m ml.batch_score ml/Test_set.xlsx -o predictions.parquet --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ml.features import RAW_COLUMNS
+from ml.registry import ENGINES, ModelRegistry
+
+PREDICTION_COLUMN = "Predicted_Price"
+
+# Set in the parent before the pool starts so forked workers share its pages
+_model = None
+_featurizer = None
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Yield the input dataset ``chunk_size`` rows at a time."""
+    suffix = Path(path).suffix.lower()
+    if suffix in (".xlsx", ".xls"):
+        # Excel cannot be read incrementally; slice it once loaded
+        frame = pd.read_excel(path)
+        for start in range(0, len(frame), chunk_size):
+            yield frame.iloc[start : start + chunk_size]
+    elif suffix == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    elif suffix == ".parquet":
+        _, pq = _pyarrow()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported input format {suffix}")
+
+
+def _pyarrow():
+    # pyarrow is optional: only Parquet input and output need it
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise SystemExit("Parquet files need pyarrow: pip install pyarrow, or use a .csv output") from e
+    return pa, pq
+
+
+class ResultWriter:
+    """Append scored chunks to a Parquet or CSV file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.format = Path(path).suffix.lower().lstrip(".")
+        if self.format not in ("parquet", "csv"):
+            raise ValueError(f"Unsupported output format .{self.format}")
+        self._started = False
+        self._parquet = None
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if self.format == "csv":
+            chunk.to_csv(self.path, mode="a" if self._started else "w", header=not self._started, index=False)
+        else:
+            pa, pq = _pyarrow()
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        self._started = True
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Add a prediction column; rows that cannot be featurized get NaN."""
+    scored = chunk.copy()
+    scored[PREDICTION_COLUMN] = np.nan
+    valid = chunk.dropna(subset=RAW_COLUMNS)
+    if len(valid):
+        features = _featurizer.transform_frame(valid)
+        features = features[features.notna().all(axis=1)]
+        if len(features):
+            predicted = _model.predict(features)
+            scored.loc[features.index, PREDICTION_COLUMN] = np.round(predicted, 2)
+    return scored
+
+
+def _init_worker(model_path: str, engine: str) -> None:
+    if _model is None:
+        # Spawned rather than forked: load our own copy
+        _load_model(model_path, engine)
+
+
+def _load_model(model_path: str, engine: str) -> None:
+    global _model, _featurizer
+    loaded = ModelRegistry(model_path, engine=engine).load()
+    _model, _featurizer = loaded.predictor, loaded.featurizer
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    model_path: str,
+    engine: str = "sklearn",
+    workers: int = 1,
+    chunk_size: int = 5000,
+) -> tuple[int, float]:
+    """Score ``input_path`` into ``output_path``; return (rows, seconds)."""
+    start = time.perf_counter()
+    _load_model(model_path, engine)
+    writer = ResultWriter(output_path)
+    rows = 0
+    try:
+        if workers <= 1:
+            for chunk in read_chunks(input_path, chunk_size):
+                writer.write(score_chunk(chunk))
+                rows += len(chunk)
+            return rows, time.perf_counter() - start
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with ProcessPoolExecutor(
+            workers, mp_context=context, initializer=_init_worker, initargs=(model_path, engine)
+        ) as executor:
+            # Bound the chunks in flight so memory does not grow with the input
+            in_flight: deque = deque()
+            for chunk in read_chunks(input_path, chunk_size):
+                in_flight.append(executor.submit(score_chunk, chunk))
+                if len(in_flight) >= 2 * workers:
+                    scored = in_flight.popleft().result()
+                    writer.write(scored)
+                    rows += len(scored)
+            while in_flight:
+                scored = in_flight.popleft().result()
+                writer.write(scored)
+                rows += len(scored)
+    finally:
+        writer.close()
+    return rows, time.perf_counter() - start
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="Test_set.xlsx style .xlsx, .csv or .parquet file")
+    parser.add_argument("-o", "--output", help="output .parquet or .csv file (default: <input>_predictions.parquet)")
+    parser.add_argument("--model", default="ml/flight_price_rf.pkl", help="pickled model artifact")
+    parser.add_argument("--engine", choices=ENGINES, default="sklearn")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    output = args.output or str(Path(args.input).with_name(Path(args.input).stem + "_predictions.parquet"))
+    rows, seconds = score_file(args.input, output, args.model, args.engine, args.workers, args.chunk_size)
+    print(f"Scored {rows} rows into {output} in {seconds:.2f} s ({rows / seconds:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Compact a trained forest into a smaller, faster artifact.
+
+Usage::
+
+    python -m ml.compact report --model ml/flight_price_rf.pkl --trees 25,50,100,all --depths 10,15,none
+    python -m ml.compact build --model ml/flight_price_rf.pkl --trees 50 --max-depth 15 --promote ml/flight_price_rf.pkl
+
+Trees are chosen on half of the training module's held-out split and
+every candidate is scored on the other half. ``report`` prints accuracy,
+latency and size for each (trees, depth) operating point; ``build``
+writes the chosen one as a pickled float32 ``FlatForest`` that the model
+registry serves directly.
+"""
+
+import argparse
+import hashlib
+import json
+import pickle
+import time
+import timeit
+from datetime import datetime, UTC
+from pathlib import Path
+
+import numpy as np
+from sklearn import metrics
+from sklearn.model_selection import train_test_split
+
+from ml.features import AIRLINES
+from ml.registry import LoadedModel, ModelRegistry
+from ml.train import load_training_data, promote, write_artifact
+from ml.tree_engine import FlatForest
+
+SELECTIONS = ("greedy", "accuracy", "first")
+
+
+def select_trees(predictions: np.ndarray, y: np.ndarray, n_trees: int, method: str = "greedy") -> np.ndarray:
+    """Pick ``n_trees`` rows of a (trees x rows) prediction matrix.
+
+    ``greedy`` adds, one at a time, the tree that most lowers the squared
+    error of the running average; ``accuracy`` keeps the individually most
+    accurate trees; ``first`` keeps estimator order.
+    """
+    if n_trees >= len(predictions):
+        return np.arange(len(predictions))
+    if method == "first":
+        return np.arange(n_trees)
+    if method == "accuracy":
+        return np.sort(np.argsort(((predictions - y) ** 2).mean(axis=1))[:n_trees])
+    chosen: list[int] = []
+    total = np.zeros(predictions.shape[1])
+    available = np.ones(len(predictions), dtype=bool)
+    for size in range(1, n_trees + 1):
+        errors = (((total + predictions) / size - y) ** 2).mean(axis=1)
+        errors[~available] = np.inf
+        best = int(np.argmin(errors))
+        chosen.append(best)
+        total += predictions[best]
+        available[best] = False
+    return np.array(chosen)
+
+
+def compact(
+    forest: FlatForest,
+    X_select: np.ndarray,
+    y_select: np.ndarray,
+    n_trees: int | None = None,
+    max_depth: int | None = None,
+    selection: str = "greedy",
+    float32: bool = True,
+) -> FlatForest:
+    """Cap the depth, select trees on the selection set and optionally store float32."""
+    compacted = forest.prune(max_depth=max_depth)
+    if n_trees is not None:
+        trees = select_trees(compacted.tree_predictions(X_select), y_select, n_trees, selection)
+        compacted = compacted.prune(trees=trees)
+    return compacted.to_float32() if float32 else compacted
+
+
+def evaluate(predictor, X: np.ndarray, y: np.ndarray) -> dict:
+    """Accuracy on ``X``, predict latency and pickled size of ``predictor``."""
+    predicted = predictor.predict(X)
+    data = pickle.dumps(predictor)
+    start = time.perf_counter()
+    pickle.loads(data)
+    load_seconds = time.perf_counter() - start
+    # One request scores an itinerary against every airline
+    request = X[: len(AIRLINES)]
+    batch = np.resize(X, (1024, X.shape[1]))
+    mse = metrics.mean_squared_error(y, predicted)
+    return {
+        "trees": getattr(predictor, "n_trees", None) or len(predictor.estimators_),
+        "max_depth": predictor.max_depth if isinstance(predictor, FlatForest) else max(e.tree_.max_depth for e in predictor.estimators_),
+        "rmse": float(np.sqrt(mse)),
+        "mae": metrics.mean_absolute_error(y, predicted),
+        "r2": metrics.r2_score(y, predicted),
+        "size_bytes": len(data),
+        "load_ms": load_seconds * 1000,
+        "request_ms": _best_of(lambda: predictor.predict(request)) * 1000,
+        "batch_1024_ms": _best_of(lambda: predictor.predict(batch)) * 1000,
+    }
+
+
+def _best_of(function, repeat: int = 5) -> float:
+    number = max(1, int(0.05 / max(timeit.timeit(function, number=1), 1e-6)))
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def load(
+    args: argparse.Namespace,
+) -> tuple[LoadedModel, FlatForest, tuple[np.ndarray, np.ndarray], tuple[np.ndarray, np.ndarray]]:
+    """Load the model and split its held-out rows into selection and evaluation halves."""
+    loaded = ModelRegistry(args.model).load()
+    X, y = load_training_data(args.data, loaded.featurizer)
+    # The split ml.train held out, so no candidate is scored on its training rows
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=args.random_state)
+    X_select, X_eval, y_select, y_eval = train_test_split(
+        X_test.to_numpy(), y_test.to_numpy(), test_size=0.5, random_state=args.random_state
+    )
+    estimator = loaded.estimator
+    forest = estimator if isinstance(estimator, FlatForest) else FlatForest.from_forest(estimator)
+    return loaded, forest, (X_select, y_select), (X_eval, y_eval)
+
+
+def report(args: argparse.Namespace) -> None:
+    loaded, forest, (X_select, y_select), (X_eval, y_eval) = load(args)
+    rows = {"original": evaluate(loaded.estimator, X_eval, y_eval), "original flat": evaluate(forest, X_eval, y_eval)}
+    for max_depth in args.depths:
+        depth_capped = forest.prune(max_depth=max_depth)
+        predictions = depth_capped.tree_predictions(X_select)
+        for n_trees in args.trees:
+            if n_trees is not None and n_trees >= forest.n_trees:
+                continue
+            trees = select_trees(predictions, y_select, n_trees or forest.n_trees, args.selection)
+            compacted = depth_capped.prune(trees=trees).to_float32()
+            name = f"{n_trees or 'all'} trees, depth {max_depth or 'all'}"
+            rows[name] = evaluate(compacted, X_eval, y_eval)
+
+    print(
+        f"{'candidate':28} {'trees':>5} {'depth':>5} {'RMSE':>8} {'MAE':>8} {'R2':>6} "
+        f"{'size MiB':>9} {'load ms':>8} {'request ms':>10} {'1024 ms':>8}"
+    )
+    for name, row in rows.items():
+        print(
+            f"{name:28} {row['trees']:5d} {row['max_depth']:5d} {row['rmse']:8.1f} {row['mae']:8.1f} {row['r2']:6.3f} "
+            f"{row['size_bytes'] / 2**20:9.2f} {row['load_ms']:8.1f} {row['request_ms']:10.3f} {row['batch_1024_ms']:8.2f}"
+        )
+    if args.output:
+        Path(args.output).write_text(json.dumps({"model": args.model, "selection": args.selection, "candidates": rows}, indent=2))
+        print(f"Wrote {args.output}")
+
+
+def build(args: argparse.Namespace) -> None:
+    loaded, forest, (X_select, y_select), (X_eval, y_eval) = load(args)
+    compacted = compact(forest, X_select, y_select, args.trees, args.max_depth, args.selection)
+    scores = evaluate(compacted, X_eval, y_eval)
+    created_at = datetime.now(tz=UTC)
+    version = created_at.strftime("%Y%m%d%H%M%S")
+    metadata = {
+        "version": version,
+        "created_at": created_at.isoformat(),
+        "feature_names": loaded.featurizer.columns,
+        "compacted_from": {"path": args.model, "sha256": loaded.checksum},
+        "params": {"trees": args.trees, "max_depth": args.max_depth, "selection": args.selection, "float32": True},
+        "metrics": scores,
+        "original_metrics": evaluate(loaded.estimator, X_eval, y_eval),
+        "data": {"path": args.data, "sha256": hashlib.sha256(Path(args.data).read_bytes()).hexdigest()},
+    }
+    artifact = write_artifact(compacted, loaded.featurizer, metadata, args.out_dir, version, name="flight_price_rf_compact")
+    print(
+        f"Wrote {artifact}: {scores['trees']} trees of depth {scores['max_depth']}, "
+        f"{scores['size_bytes'] / 2**20:.2f} MiB, RMSE {scores['rmse']:.1f} "
+        f"(was {metadata['original_metrics']['rmse']:.1f}), R2 {scores['r2']:.3f}"
+    )
+    if args.promote:
+        promote(artifact, args.promote)
+        print(f"Promoted {artifact.name} to {args.promote}")
+
+
+def _optional_ints(value: str) -> list[int | None]:
+    return [None if item in ("all", "none") else int(item) for item in value.split(",")]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help in (("report", "compare operating points"), ("build", "write a compacted artifact")):
+        command = commands.add_parser(name, help=help)
+        command.add_argument("--model", default="ml/flight_price_rf.pkl", help="pickled model artifact")
+        command.add_argument("--data", default="ml/Flight_data.xlsx", help="the model's training data")
+        command.add_argument("--random-state", type=int, default=42, help="the split ml.train used")
+        command.add_argument("--selection", choices=SELECTIONS, default="greedy")
+    report_parser, build_parser = commands.choices["report"], commands.choices["build"]
+    report_parser.add_argument("--trees", type=_optional_ints, default=[10, 25, 50, 100, None], help="comma separated tree counts, or all")
+    report_parser.add_argument("--depths", type=_optional_ints, default=[10, 15, 20, None], help="comma separated depth caps, or none")
+    report_parser.add_argument("--output", metavar="PATH", help="also write the report as JSON")
+    build_parser.add_argument("--trees", type=int, default=None, help="trees to keep (default all)")
+    build_parser.add_argument("--max-depth", type=int, default=None, help="depth cap (default none)")
+    build_parser.add_argument("--out-dir", default="ml/artifacts")
+    build_parser.add_argument("--promote", metavar="PATH", help="also copy the artifact to the served model path")
+    args = parser.parse_args(argv)
+    report(args) if args.command == "report" else build(args)
+
+
+if __name__ == "__main__":
+    main()
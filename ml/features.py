@@ -0,0 +1,216 @@
+"""Feature construction shared by training, offline scoring and the API.
+
+``Featurizer`` reproduces the notebook's transformation of
+``Flight_data.xlsx`` style rows into the model's feature columns, vectorized,
+and encodes API itineraries into the same layout.
+"""
+
+import json
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+STOPS = {"non-stop": 0, "1 stop": 1, "2 stops": 2, "3 stops": 3, "4 stops": 4}
+
+# Vocabularies with the baseline category first. As with the notebook's
+# ``get_dummies(drop_first=True)`` the baseline has no column and encodes
+# as all zeros.
+AIRLINES = (
+    "Air Asia",
+    "Air India",
+    "GoAir",
+    "IndiGo",
+    "Jet Airways",
+    "Jet Airways Business",
+    "Multiple carriers",
+    "Multiple carriers Premium economy",
+    "SpiceJet",
+    "Trujet",
+    "Vistara",
+    "Vistara Premium economy",
+)
+SOURCES = ("Banglore", "Chennai", "Delhi", "Kolkata", "Mumbai")
+DESTINATIONS = ("Banglore", "Cochin", "Delhi", "Hyderabad", "Kolkata", "New Delhi")
+
+NUMERIC_COLUMNS = [
+    "Total_Stops",
+    "Journey_day",
+    "Journey_month",
+    "Dep_hour",
+    "Dep_min",
+    "Arrival_hour",
+    "Arrival_min",
+    "Duration_hours",
+    "Duration_mins",
+]
+RAW_COLUMNS = ["Airline", "Date_of_Journey", "Source", "Destination", "Dep_Time", "Arrival_Time", "Duration", "Total_Stops"]
+
+
+@dataclass(frozen=True)
+class Featurizer:
+    """Owns the model's column order, categorical vocabularies and time decomposition.
+
+    Columns are the nine numeric features, then the airline, source and
+    destination one-hots. Itineraries (objects with ``origin``,
+    ``destination``, ``departure_time``, ``arrival_time`` and
+    ``transit_count``) are encoded with an all-zero airline block, which
+    ``expand`` fills in per airline.
+    """
+
+    airlines: tuple[str, ...] = AIRLINES
+    sources: tuple[str, ...] = SOURCES
+    destinations: tuple[str, ...] = DESTINATIONS
+
+    @cached_property
+    def columns(self) -> list[str]:
+        return [
+            *NUMERIC_COLUMNS,
+            *self.airlines[1:],
+            *(f"Source_{source}" for source in self.sources[1:]),
+            *(f"Destination_{destination}" for destination in self.destinations[1:]),
+        ]
+
+    @property
+    def n_features(self) -> int:
+        return len(self.columns)
+
+    @cached_property
+    def airline_slice(self) -> slice:
+        start = len(NUMERIC_COLUMNS)
+        return slice(start, start + len(self.airlines) - 1)
+
+    @cached_property
+    def source_slice(self) -> slice:
+        start = self.airline_slice.stop
+        return slice(start, start + len(self.sources) - 1)
+
+    @cached_property
+    def destination_slice(self) -> slice:
+        start = self.source_slice.stop
+        return slice(start, start + len(self.destinations) - 1)
+
+    @cached_property
+    def _source_columns(self) -> dict[str, int | None]:
+        return _column_index(self.sources, self.source_slice)
+
+    @cached_property
+    def _destination_columns(self) -> dict[str, int | None]:
+        return _column_index(self.destinations, self.destination_slice)
+
+    @cached_property
+    def _airline_columns(self) -> dict[str, int | None]:
+        return _column_index(self.airlines, slice(0, len(self.airlines) - 1))
+
+    def encode_itinerary(self, record) -> np.ndarray:
+        """Encode one itinerary into a feature row."""
+        return self.encode_itineraries([record])[0]
+
+    def encode_itineraries(self, records: Sequence) -> np.ndarray:
+        """Encode itineraries into a preallocated (records x features) matrix.
+
+        Raises ValueError for an origin or destination outside the vocabulary.
+        """
+        features = np.zeros((len(records), self.n_features))
+        for row, record in zip(features, records):
+            departure, arrival = record.departure_time, record.arrival_time
+            seconds = (arrival - departure).total_seconds()
+            row[: len(NUMERIC_COLUMNS)] = (
+                record.transit_count,
+                departure.day,
+                departure.month,
+                departure.hour,
+                departure.minute,
+                arrival.hour,
+                arrival.minute,
+                seconds // 3600,
+                (seconds % 3600) // 60,
+            )
+            source = _lookup(self._source_columns, record.origin, "origin")
+            if source is not None:
+                row[source] = 1
+            destination = _lookup(self._destination_columns, record.destination, "destination")
+            if destination is not None:
+                row[destination] = 1
+        return features
+
+    def airline_block(self, airlines: Sequence[str]) -> np.ndarray:
+        """One-hot airline rows, one per airline, for ``expand``."""
+        block = np.zeros((len(airlines), len(self.airlines) - 1))
+        for row, airline in zip(block, airlines):
+            column = _lookup(self._airline_columns, airline, "airline")
+            if column is not None:
+                row[column] = 1
+        return block
+
+    def expand(self, itineraries: np.ndarray, airline_block: np.ndarray) -> np.ndarray:
+        """Broadcast itinerary rows against airline rows, itinerary major."""
+        n_itineraries, n_airlines = len(itineraries), len(airline_block)
+        features = np.empty((n_itineraries, n_airlines, self.n_features))
+        features[:] = itineraries[:, None, :]
+        features[:, :, self.airline_slice] = airline_block
+        return features.reshape(n_itineraries * n_airlines, self.n_features)
+
+    def transform_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Return the feature frame for raw spreadsheet rows, keeping the index.
+
+        Rows must not have missing values in ``RAW_COLUMNS``. Unknown
+        categories encode as all zeros; unknown stop counts and unparsable
+        dates, times and durations encode as NaN.
+        """
+        journey = pd.to_datetime(frame["Date_of_Journey"], format="%d/%m/%Y", errors="coerce")
+        departure = _clock(frame["Dep_Time"])
+        arrival = _clock(frame["Arrival_Time"])
+        # "2h 50m", "19h" and "25m" all occur in the data
+        duration = frame["Duration"].str.extract(r"^\s*(?:(\d+)h)?\s*(?:(\d+)m)?\s*$").astype(float)
+        unparsed = duration.isna().all(axis=1)
+        duration = duration.fillna(0)
+        duration[unparsed] = np.nan
+
+        features = np.empty((len(frame), self.n_features))
+        features[:, 0] = frame["Total_Stops"].map(STOPS)
+        features[:, 1] = journey.dt.day
+        features[:, 2] = journey.dt.month
+        features[:, 3:5] = departure
+        features[:, 5:7] = arrival
+        features[:, 7:9] = duration
+        features[:, self.airline_slice] = _one_hot(frame["Airline"], self.airlines[1:])
+        features[:, self.source_slice] = _one_hot(frame["Source"], self.sources[1:])
+        features[:, self.destination_slice] = _one_hot(frame["Destination"], self.destinations[1:])
+        return pd.DataFrame(features, columns=self.columns, index=frame.index)
+
+    def save(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(asdict(self), indent=2))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Featurizer":
+        return cls(**{name: tuple(values) for name, values in json.loads(Path(path).read_text()).items()})
+
+
+def featurizer_path(model_path: str | Path) -> Path:
+    """Where the featurizer for a model artifact is stored."""
+    return Path(model_path).with_suffix(".featurizer.json")
+
+
+def _column_index(vocabulary: tuple[str, ...], columns: slice) -> dict[str, int | None]:
+    # The baseline maps to None: it has no column
+    return {name: (columns.start + index - 1 if index else None) for index, name in enumerate(vocabulary)}
+
+
+def _lookup(columns: dict[str, int | None], name: str, kind: str) -> int | None:
+    try:
+        return columns[name]
+    except KeyError:
+        raise ValueError(f"Unknown {kind} {name}") from None
+
+
+def _one_hot(values: pd.Series, categories: tuple[str, ...]) -> np.ndarray:
+    return values.to_numpy(dtype=object)[:, None] == np.array(categories, dtype=object)
+
+
+def _clock(times: pd.Series) -> pd.DataFrame:
+    """Split "HH:MM" (optionally followed by a date) into hour and minute columns, NaN if unparsable."""
+    return times.str.extract(r"^\s*(\d{1,2}):(\d{2})").astype(float)
@@ -0,0 +1,196 @@
+"""Process-wide registry for the pickled price model."""
+
+import asyncio
+import hashlib
+import os
+import pickle
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable
+
+from ml.features import Featurizer, featurizer_path
+from ml.tree_engine import FlatForest
+
+ENGINES = ("sklearn", "flat")
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """A loaded model artifact and where it came from."""
+
+    estimator: Any
+    predictor: Any
+    featurizer: Featurizer
+    path: str
+    checksum: str
+    mtime: float
+    size: int
+    load_seconds: float
+
+    @property
+    def version(self) -> str:
+        """Short artifact version derived from its checksum."""
+        return self.checksum[:12]
+
+
+class ModelRegistry:
+    """Load the model once per process and reload it when the artifact changes.
+
+    ``predictor`` on the loaded model is what callers should score with: the
+    estimator itself for the ``sklearn`` engine, or its ``FlatForest``
+    compilation for the ``flat`` engine. Artifacts written by
+    ``ml.compact`` pickle a ``FlatForest`` and are served as is by either
+    engine. The featurizer is read from the
+    ``.featurizer.json`` file next to the artifact, falling back to the
+    notebook's vocabularies for artifacts trained before it existed.
+
+    The artifact is re-checked at most every ``check_interval`` seconds. A
+    changed mtime or size triggers a checksum; only different content is
+    unpickled, and the new model replaces the old one in a single swap so
+    callers never observe a half-loaded estimator. ``get_async`` does the
+    re-check in a worker thread and keeps returning the current model until
+    the new one is swapped in, so event loop callers never wait on an
+    unpickle.
+    """
+
+    def __init__(self, path: str, check_interval: float = 5.0, engine: str = "sklearn") -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown model engine {engine!r}, expected one of {ENGINES}")
+        self.path = path
+        self.check_interval = check_interval
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._current: LoadedModel | None = None
+        self._checked_at = 0.0
+        self._listeners: list[Callable[[LoadedModel], None]] = []
+        self._reloading: asyncio.Task | None = None
+
+    def add_listener(self, listener: Callable[[LoadedModel], None]) -> None:
+        """Call ``listener`` with the new model whenever a different artifact is loaded."""
+        self._listeners.append(listener)
+
+    def load(self) -> LoadedModel:
+        """Load the artifact unconditionally."""
+        with self._lock:
+            self._swap(self._load())
+            self._checked_at = time.monotonic()
+            return self._current
+
+    def get(self) -> LoadedModel:
+        """Return the current model, reloading it if the artifact changed."""
+        current = self._current
+        if current is None or time.monotonic() - self._checked_at >= self.check_interval:
+            current = self._refresh()
+        return current
+
+    async def get_async(self) -> LoadedModel:
+        """Return the current model, re-checking the artifact in the background if due."""
+        if self._reloading is None and (
+            self._current is None or time.monotonic() - self._checked_at >= self.check_interval
+        ):
+            self._reloading = asyncio.create_task(self._reload())
+        if self._current is None:
+            # Nothing to serve yet: wait for the first load
+            await asyncio.shield(self._reloading)
+        return self._current
+
+    def stats(self) -> dict[str, Any]:
+        """Describe the currently loaded artifact."""
+        current = self._current
+        if current is None:
+            return {"path": self.path, "loaded": False}
+        return {
+            "path": current.path,
+            "loaded": True,
+            "engine": self.engine,
+            "version": current.version,
+            "size_bytes": current.size,
+            "load_seconds": current.load_seconds,
+        }
+
+    def _refresh(self) -> LoadedModel:
+        with self._lock:
+            loaded = self._check()
+            if loaded is not None:
+                self._swap(loaded)
+            return self._current
+
+    async def _reload(self) -> None:
+        try:
+            loaded = await asyncio.to_thread(self._check_locked)
+            if loaded is not None:
+                # Swap on the event loop so listeners run there too
+                with self._lock:
+                    self._swap(loaded)
+        finally:
+            self._reloading = None
+
+    def _check_locked(self) -> LoadedModel | None:
+        with self._lock:
+            return self._check()
+
+    def _check(self) -> LoadedModel | None:
+        """Load the artifact if it is due for a check and changed; the caller holds the lock."""
+        current = self._current
+        if current is not None and time.monotonic() - self._checked_at < self.check_interval:
+            # Another thread refreshed while we waited for the lock
+            return None
+        self._checked_at = time.monotonic()
+        if current is None:
+            return self._load()
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            print(f"Model artifact check failed, keeping {current.version}: {e}")
+            return None
+        if stat.st_mtime == current.mtime and stat.st_size == current.size:
+            return None
+        try:
+            return self._load(previous=current)
+        except Exception as e:  # a half-written artifact must not take the server down
+            print(f"Model reload failed, keeping {current.version}: {e}")
+            return None
+
+    def _swap(self, loaded: LoadedModel) -> None:
+        previous, self._current = self._current, loaded
+        if previous is None or previous.checksum != loaded.checksum:
+            for listener in self._listeners:
+                listener(loaded)
+
+    def _load(self, previous: LoadedModel | None = None) -> LoadedModel:
+        start = time.perf_counter()
+        with open(self.path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            data = file.read()
+        checksum = hashlib.sha256(data).hexdigest()
+        if previous is not None and checksum == previous.checksum:
+            # Touched but unchanged, no need to unpickle again
+            return replace(previous, mtime=stat.st_mtime)
+        estimator = pickle.loads(data)
+        sidecar = featurizer_path(self.path)
+        featurizer = Featurizer.load(sidecar) if sidecar.exists() else Featurizer()
+        if getattr(estimator, "n_features_in_", featurizer.n_features) != featurizer.n_features:
+            raise ValueError(
+                f"Model expects {estimator.n_features_in_} features, featurizer builds {featurizer.n_features}"
+            )
+        if isinstance(estimator, FlatForest) or self.engine == "sklearn":
+            # Compacted artifacts (see ml.compact) are already flat
+            predictor = estimator
+        else:
+            predictor = FlatForest.from_forest(estimator)
+        loaded = LoadedModel(
+            estimator=estimator,
+            predictor=predictor,
+            featurizer=featurizer,
+            path=self.path,
+            checksum=checksum,
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            load_seconds=time.perf_counter() - start,
+        )
+        print(
+            f"Loaded {type(predictor).__name__} model {loaded.path} version {loaded.version} "
+            f"({loaded.size} bytes) in {loaded.load_seconds * 1000:.1f} ms"
+        )
+        return loaded
@@ -1,8 +1,8 @@
-import pickle
 import numpy as np
-from auth.models.flight_record import Airline
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from ml.features import Featurizer
 # Make predictions using the loaded model
 
 # %% predict Price
@@ -33,43 +33,39 @@ sample_input = np.array(
 )
 
 
-async def get_predicted_price(
-    transit_count: int,
-    journey_date: list,
-    departure: list,
-    arrival: list,
-    source: list,
-    destination: list,
-    duration: list,
-):
-    with open("ml/flight_price_rf.pkl", "rb") as file:
-        forest = pickle.load(file)
+@lru_cache(maxsize=8)
+def airline_block(featurizer: Featurizer, airlines: tuple[str, ...]) -> np.ndarray:
+    """The airline one-hot rows, built once per featurizer and airline set."""
+    block = featurizer.airline_block(airlines)
+    # Shared between requests
+    block.flags.writeable = False
+    return block
 
-    airlines: list[Airline] = await Airline.find().to_list()
 
-    def predict(airline: Airline):
-        sample_input = [
-            np.concatenate(
-                (
-                    transit_count,
-                    journey_date,
-                    departure,
-                    arrival,
-                    duration,
-                    airline.array,
-                    source,
-                    destination,
-                )
-            )
-        ]
-        predicted_price = round(forest.predict(sample_input)[0], 2)
-        return {"predicted_price": predicted_price, "airline": airline.airline}
+async def get_predicted_price(forest, featurizer: Featurizer, airlines: tuple[str, ...], itinerary: np.ndarray):
+    return (await get_predicted_prices(forest, featurizer, airlines, itinerary[None, :]))[0]
 
-    with ThreadPoolExecutor() as executor:
-        loop = asyncio.get_running_loop()
-        tasks = [
-            loop.run_in_executor(executor, predict, airline) for airline in airlines
-        ]
-        predicted_prices = await asyncio.gather(*tasks)
 
-    return predicted_prices
+async def get_predicted_prices(
+    forest,
+    featurizer: Featurizer,
+    airlines: tuple[str, ...],
+    itineraries: np.ndarray,
+) -> list[list[dict]]:
+    """Score every (itinerary, airline) pair with a single predict call.
+
+    ``itineraries`` are rows from ``Featurizer.encode_itineraries``.
+    """
+    if not airlines or not len(itineraries):
+        return [[] for _ in range(len(itineraries))]
+
+    features = featurizer.expand(itineraries, airline_block(featurizer, airlines))
+    # One 2D predict scores the whole matrix; run it off the event loop
+    predicted_prices = np.round(await asyncio.to_thread(forest.predict, features), 2)
+    return [
+        [
+            {"predicted_price": predicted_price, "airline": airline}
+            for predicted_price, airline in zip(row, airlines)
+        ]
+        for row in predicted_prices.reshape(len(itineraries), len(airlines)).tolist()
+    ]
@@ -0,0 +1,163 @@
+"""Train the flight price random forest reproducibly.
+
+Usage::
+
+    python -m ml.train --data ml/Flight_data.xlsx --out-dir ml/artifacts --promote ml/flight_price_rf.pkl
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from datetime import datetime, UTC
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn import metrics
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import RandomizedSearchCV, train_test_split
+
+from ml.features import RAW_COLUMNS, Featurizer, featurizer_path
+
+TARGET_COLUMN = "Price"
+
+# The notebook's RandomizedSearchCV grid
+SEARCH_GRID = {
+    "n_estimators": [int(x) for x in np.linspace(start=100, stop=1200, num=12)],
+    "max_features": ["sqrt", "log2"],
+    "max_depth": [int(x) for x in np.linspace(5, 30, num=6)],
+    "min_samples_split": [2, 5, 10, 15, 100],
+    "min_samples_leaf": [1, 2, 5, 10],
+}
+
+
+def load_training_data(path: str, featurizer: Featurizer) -> tuple[pd.DataFrame, pd.Series]:
+    """Return the feature frame and target for a Flight_data.xlsx style file."""
+    frame = pd.read_excel(path) if Path(path).suffix.lower() in (".xlsx", ".xls") else pd.read_csv(path)
+    frame = frame.dropna(subset=[*RAW_COLUMNS, TARGET_COLUMN])
+    features = featurizer.transform_frame(frame)
+    complete = features.notna().all(axis=1)
+    return features[complete], frame.loc[complete, TARGET_COLUMN]
+
+
+def train(
+    X: pd.DataFrame,
+    y: pd.Series,
+    random_state: int = 42,
+    search_iterations: int = 0,
+    params: dict | None = None,
+) -> tuple[RandomForestRegressor, dict]:
+    """Fit the forest on a train split and return it with held-out metrics."""
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=random_state)
+    if search_iterations:
+        search = RandomizedSearchCV(
+            estimator=RandomForestRegressor(random_state=random_state),
+            param_distributions=SEARCH_GRID,
+            scoring="neg_mean_squared_error",
+            n_iter=search_iterations,
+            cv=5,
+            random_state=random_state,
+            n_jobs=-1,
+        )
+        search.fit(X_train, y_train)
+        model = search.best_estimator_
+    else:
+        model = RandomForestRegressor(random_state=random_state, n_jobs=-1, **(params or {}))
+        model.fit(X_train, y_train)
+    # Serve single-threaded: sequential tree accumulation is deterministic
+    model.n_jobs = None
+
+    y_pred = model.predict(X_test)
+    mse = metrics.mean_squared_error(y_test, y_pred)
+    scores = {
+        "mae": metrics.mean_absolute_error(y_test, y_pred),
+        "mse": mse,
+        "rmse": float(np.sqrt(mse)),
+        "r2": metrics.r2_score(y_test, y_pred),
+        "train_r2": model.score(X_train, y_train),
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+    }
+    return model, scores
+
+
+def write_artifact(
+    model, featurizer: Featurizer, metadata: dict, out_dir: str, version: str, name: str = "flight_price_rf"
+) -> Path:
+    """Write ``<name>-<version>.pkl`` with its featurizer and ``.json`` metadata atomically."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    artifact = out / f"{name}-{version}.pkl"
+    data = pickle.dumps(model)
+    metadata = {**metadata, "artifact": artifact.name, "sha256": hashlib.sha256(data).hexdigest(), "size_bytes": len(data)}
+    featurizer.save(featurizer_path(artifact))
+    _atomic_write(artifact, data)
+    _atomic_write(artifact.with_suffix(".json"), json.dumps(metadata, indent=2).encode())
+    return artifact
+
+
+def promote(artifact: Path, target: str) -> None:
+    """Copy an artifact (and its featurizer and metadata) over the served model path atomically."""
+    # The featurizer goes first so a reload never pairs the new model with the old one
+    _atomic_write(featurizer_path(target), featurizer_path(artifact).read_bytes())
+    _atomic_write(Path(target), artifact.read_bytes())
+    shutil.copyfile(artifact.with_suffix(".json"), Path(target).with_suffix(".json"))
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    # The model registry may be re-reading the target while we write
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default="ml/Flight_data.xlsx")
+    parser.add_argument("--out-dir", default="ml/artifacts")
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--search", type=int, default=0, metavar="N", help="run N RandomizedSearchCV iterations over the notebook grid")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--promote", metavar="PATH", help="also copy the artifact to the served model path")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    featurizer = Featurizer()
+    X, y = load_training_data(args.data, featurizer)
+    model, scores = train(
+        X,
+        y,
+        random_state=args.random_state,
+        search_iterations=args.search,
+        params={"n_estimators": args.n_estimators, "max_depth": args.max_depth},
+    )
+    training_seconds = time.perf_counter() - start
+
+    created_at = datetime.now(tz=UTC)
+    version = created_at.strftime("%Y%m%d%H%M%S")
+    metadata = {
+        "version": version,
+        "created_at": created_at.isoformat(),
+        "feature_names": featurizer.columns,
+        "params": model.get_params(),
+        "metrics": scores,
+        "training_seconds": training_seconds,
+        "data": {"path": args.data, "sha256": hashlib.sha256(Path(args.data).read_bytes()).hexdigest(), "rows": len(X)},
+        "sklearn_version": sklearn.__version__,
+    }
+    artifact = write_artifact(model, featurizer, metadata, args.out_dir, version)
+    print(f"Wrote {artifact} in {training_seconds:.1f} s: RMSE {scores['rmse']:.1f}, R2 {scores['r2']:.3f}")
+    if args.promote:
+        promote(artifact, args.promote)
+        print(f"Promoted {artifact.name} to {args.promote}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Flattened NumPy inference engine for fitted random forest regressors."""
+
+import numpy as np
+
+# Upper bound on the (trees x rows) node matrix evaluated at once
+MAX_BATCH_NODES = 1 << 22
+
+
+class FlatForest:
+    """A fitted forest packed into contiguous node arrays.
+
+    Every tree's nodes are laid out back to back in shared ``feature``,
+    ``threshold``, ``children_left``, ``children_right`` and ``value``
+    buffers, with child indices rewritten to global offsets. Leaves point
+    to themselves on both sides, so a batch is evaluated for all trees at
+    once by stepping every (tree, row) cursor one level per iteration.
+
+    For a forest packed by ``from_forest``, ``predict`` matches
+    ``RandomForestRegressor.predict`` bit for bit: the input is cast to
+    float32 as sklearn does before traversal, and the per-tree predictions
+    are summed in estimator order before dividing by the number of trees,
+    like sklearn's single-threaded accumulation. ``prune`` and
+    ``to_float32`` derive smaller forests that trade some accuracy for
+    size and speed; see ``ml.compact``.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children_left: np.ndarray,
+        children_right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features_in: int,
+    ) -> None:
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features_in
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the packed node buffers."""
+        return sum(
+            array.nbytes
+            for array in (self.feature, self.threshold, self.children_left, self.children_right, self.value)
+        )
+
+    @classmethod
+    def from_forest(cls, forest) -> "FlatForest":
+        """Pack the trees of a fitted single-output sklearn forest regressor."""
+        if getattr(forest, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be flattened")
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        sizes = np.array([tree.node_count for tree in trees], dtype=np.intp)
+        roots = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.intp)
+        n_nodes = int(sizes.sum())
+
+        feature = np.empty(n_nodes, dtype=np.intp)
+        threshold = np.empty(n_nodes, dtype=np.float64)
+        children_left = np.empty(n_nodes, dtype=np.intp)
+        children_right = np.empty(n_nodes, dtype=np.intp)
+        value = np.empty(n_nodes, dtype=np.float64)
+        for tree, offset in zip(trees, roots):
+            nodes = slice(offset, offset + tree.node_count)
+            leaf = tree.children_left == -1
+            index = np.arange(offset, offset + tree.node_count, dtype=np.intp)
+            feature[nodes] = np.where(leaf, 0, tree.feature)
+            # Any input, inf included, satisfies x <= inf and stays on the leaf
+            threshold[nodes] = np.where(leaf, np.inf, tree.threshold)
+            children_left[nodes] = np.where(leaf, index, tree.children_left + offset)
+            children_right[nodes] = np.where(leaf, index, tree.children_right + offset)
+            value[nodes] = tree.value[:, 0, 0]
+
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            children_left=children_left,
+            children_right=children_right,
+            value=value,
+            roots=roots,
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features_in=forest.n_features_in_,
+        )
+
+    def predict(self, X) -> np.ndarray:
+        """Predict a 2D batch of feature rows."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Expected a 2D array with {self.n_features_in_} features, got shape {X.shape}"
+            )
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN or infinity")
+        rows_per_chunk = max(1, MAX_BATCH_NODES // self.n_trees)
+        if len(X) <= rows_per_chunk:
+            return self._predict(X)
+        return np.concatenate(
+            [self._predict(X[start : start + rows_per_chunk]) for start in range(0, len(X), rows_per_chunk)]
+        )
+
+    def tree_predictions(self, X) -> np.ndarray:
+        """Return every tree's predictions for a 2D batch, shaped (trees, rows)."""
+        X = np.asarray(X, dtype=np.float32)
+        rows_per_chunk = max(1, MAX_BATCH_NODES // self.n_trees)
+        return np.concatenate(
+            [self._leaf_values(X[start : start + rows_per_chunk]) for start in range(0, len(X), rows_per_chunk)],
+            axis=1,
+        )
+
+    def prune(self, trees=None, max_depth: int | None = None) -> "FlatForest":
+        """Return a forest of just ``trees`` (indices, in order) cut off below ``max_depth``.
+
+        Nodes at ``max_depth`` become leaves predicting their own value,
+        which sklearn stores for internal nodes too: the mean target of
+        the training samples that reached them.
+        """
+        trees = np.arange(self.n_trees) if trees is None else np.asarray(trees, dtype=np.intp)
+        if len(np.unique(trees)) != len(trees):
+            raise ValueError("Trees must not repeat")
+        max_depth = self.max_depth if max_depth is None else min(max_depth, self.max_depth)
+        is_leaf = self.children_left == np.arange(len(self.children_left))
+
+        # Walk all trees level by level, remembering which tree a node is in
+        frontier, owner = self.roots[trees], np.arange(len(trees))
+        levels, owners = [frontier], [owner]
+        for _ in range(max_depth):
+            internal = ~is_leaf[frontier]
+            frontier, owner = frontier[internal], owner[internal]
+            if not len(frontier):
+                break
+            frontier = np.concatenate((self.children_left[frontier], self.children_right[frontier]))
+            owner = np.concatenate((owner, owner))
+            levels.append(frontier)
+            owners.append(owner)
+        # Keep each tree's nodes contiguous, breadth first within the tree
+        order = np.argsort(np.concatenate(owners), kind="stable")
+        kept = np.concatenate(levels)[order]
+        leaf = is_leaf[kept]
+        leaf[np.argsort(order)[len(kept) - len(levels[-1]) :]] = True
+
+        new_index = np.zeros(len(self.children_left), dtype=np.intp)
+        new_index[kept] = np.arange(len(kept))
+        index = np.arange(len(kept))
+        return FlatForest(
+            feature=np.where(leaf, 0, self.feature[kept]).astype(self.feature.dtype),
+            threshold=np.where(leaf, np.inf, self.threshold[kept]).astype(self.threshold.dtype),
+            children_left=np.where(leaf, index, new_index[self.children_left[kept]]).astype(self.children_left.dtype),
+            children_right=np.where(leaf, index, new_index[self.children_right[kept]]).astype(self.children_right.dtype),
+            value=self.value[kept],
+            roots=new_index[self.roots[trees]],
+            max_depth=len(levels) - 1,
+            n_features_in=self.n_features_in_,
+        )
+
+    def to_float32(self) -> "FlatForest":
+        """Return a copy storing thresholds and values as float32.
+
+        Each threshold is rounded down to the nearest float32, so every
+        float32 input still takes the same branch; only the leaf values
+        lose precision. Node indices stay ``intp``: NumPy would convert
+        narrower index arrays on every gather.
+        """
+        threshold = self.threshold.astype(np.float32)
+        above = threshold > self.threshold
+        threshold[above] = np.nextafter(threshold[above], np.float32(-np.inf))
+        return FlatForest(
+            feature=self.feature,
+            threshold=threshold,
+            children_left=self.children_left,
+            children_right=self.children_right,
+            value=self.value.astype(np.float32),
+            roots=self.roots,
+            max_depth=self.max_depth,
+            n_features_in=self.n_features_in_,
+        )
+
+    def _predict(self, X: np.ndarray) -> np.ndarray:
+        # Sum in estimator order; + 0.0 matches sklearn's zero-initialised accumulator
+        total = np.add.accumulate(self._leaf_values(X), axis=0, dtype=np.float64)[-1] + 0.0
+        return total / self.n_trees
+
+    def _leaf_values(self, X: np.ndarray) -> np.ndarray:
+        columns = X.T
+        rows = np.arange(len(X))
+        nodes = np.repeat(self.roots[:, None], len(X), axis=1)
+        for _ in range(self.max_depth):
+            go_left = columns[self.feature[nodes], rows] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+        return self.value[nodes]